@@ -16,7 +16,7 @@ import argparse
 from argparse import RawTextHelpFormatter
 import os
 
-from kale.common import kfputils
+from kale.common import kfputils, profutils
 from kale.compiler import Compiler
 from kale.processors import NotebookProcessor
 
@@ -56,6 +56,9 @@ def main():
     general_group.add_argument("--upload_pipeline", action="store_const", const=True)
     general_group.add_argument("--run_pipeline", action="store_const", const=True)
     general_group.add_argument("--debug", action="store_true")
+    general_group.add_argument(
+        "--profile", action="store_true", help="Report the time spent in each compilation phase."
+    )
     general_group.add_argument(
         "--dev",
         action="store_true",
@@ -80,6 +83,15 @@ def main():
             "Default: http://127.0.0.1:3141/root/dev/+simple/"
         ),
     )
+    general_group.add_argument(
+        "--formatter",
+        type=str,
+        default=None,
+        help=(
+            "Formatter applied to the generated code: 'autopep8' (default),"
+            " 'none' or the path to a function, e.g. 'package.module:function'."
+        ),
+    )
 
     metadata_group = parser.add_argument_group("Notebook Metadata Overrides", METADATA_GROUP_DESC)
     metadata_group.add_argument(
@@ -106,6 +118,11 @@ def main():
     metadata_group.add_argument(
         "--volume-access-mode", type=str, help="The access mode for the created volumes"
     )
+    metadata_group.add_argument(
+        "--cache_dir",
+        type=str,
+        help="Directory on a shared volume where the outputs of the steps are cached",
+    )
     args = parser.parse_args()
 
     if args.pip_index_urls:
@@ -125,29 +142,38 @@ def main():
         for a in mt_overrides_group._group_actions
         if getattr(args, a.dest, None) is not None
     }
-    processor = NotebookProcessor(args.nb, mt_overrides_group_dict)
-    pipeline = processor.run()
-    imports_and_functions = processor.get_imports_and_functions()
-    dsl_script_path = Compiler(pipeline, imports_and_functions).compile()
+    profutils.enable_profiling(args.profile)
+    with profutils.phase("process notebook"):
+        processor = NotebookProcessor(args.nb, mt_overrides_group_dict)
+        pipeline = processor.run()
+        imports_and_functions = processor.get_imports_and_functions()
+    with profutils.phase("generate dsl"):
+        compiler = Compiler(pipeline, imports_and_functions, formatter=args.formatter)
+        dsl_script_path = compiler.compile()
     pipeline_name = pipeline.config.pipeline_name
     print(f"dsl_script_path: {dsl_script_path}")
 
-    pipeline_package_path = kfputils.compile_pipeline(dsl_script_path, pipeline_name)
+    with profutils.phase("compile kfp pipeline"):
+        pipeline_package_path = compiler.compile_package()
     if args.upload_pipeline or args.run_pipeline:
-        pipeline_id, version_id = kfputils.upload_pipeline(
-            pipeline_package_path=pipeline_package_path,
-            pipeline_name=pipeline_name,
-            host=pipeline.config.kfp_host,
-        )
-        print(f"pipeline_id: {pipeline_id}, version_id: {version_id}")
-        if args.run_pipeline:
-            kfputils.run_pipeline(
-                experiment_name=pipeline.config.experiment_name,
-                pipeline_id=pipeline_id,
-                version_id=version_id,
-                host=pipeline.config.kfp_host,
+        with profutils.phase("upload pipeline"):
+            pipeline_id, version_id = kfputils.upload_pipeline(
                 pipeline_package_path=pipeline_package_path,
+                pipeline_name=pipeline_name,
+                host=pipeline.config.kfp_host,
             )
+        print(f"pipeline_id: {pipeline_id}, version_id: {version_id}")
+        if args.run_pipeline:
+            with profutils.phase("run pipeline"):
+                kfputils.run_pipeline(
+                    experiment_name=pipeline.config.experiment_name,
+                    pipeline_id=pipeline_id,
+                    version_id=version_id,
+                    host=pipeline.config.kfp_host,
+                    pipeline_package_path=pipeline_package_path,
+                )
+    if args.profile:
+        print(profutils.format_report())
 
 
 if __name__ == "__main__":
@@ -239,6 +239,35 @@ def get_function_and_class_names(code):
     return names
 
 
+def get_global_names(code):
+    """Get the names bound at the module level of a code block.
+
+    Names bound inside functions, classes, lambdas and comprehensions are
+    local to them, so they are not included.
+
+    Args:
+        code: Multiline string representing Python code
+
+    Returns: Set of string names. None if the code contains star imports,
+        whose names cannot be determined statically.
+    """
+    names = set()
+    scopes = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    local_scopes = (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+    for node in walk(ast.parse(code), stop_at=scopes, ignore=local_scopes):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                # `import a.b` binds `a`
+                names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, scopes):
+            names.add(node.name)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+    return names
+
+
 def parse_assignments_expressions(code):
     """Parse a code block composed of variable assignments.
 
@@ -0,0 +1,202 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Suite of helpers to cache the results of pipeline steps.
+
+A step is fingerprinted using its source code, the digests of the artifacts
+it consumes and the values of the pipeline parameters it uses. When a step
+with the same fingerprint has already run, its marshalled outputs are restored
+from the cache store instead of executing the step again.
+
+The cache store is a plain directory. When running in a pipeline, this should
+be a path on a volume that is mounted by all the steps (e.g. a PVC).
+"""
+
+from collections.abc import Callable
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Any
+
+from kale.common import utils
+
+log = logging.getLogger(__name__)
+
+KALE_CACHE_DIR_ENV = "KALE_CACHE_DIR"
+CACHE_MANIFEST_NAME = "manifest.json"
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def get_cache_dir(cache_dir: str = None) -> str | None:
+    """Get the cache directory, falling back to the KALE_CACHE_DIR env var."""
+    return cache_dir or os.getenv(KALE_CACHE_DIR_ENV)
+
+
+def digest_path(path: str) -> str:
+    """Compute the sha256 digest of a file or of a directory's contents."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            # walk in a deterministic order
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                h.update(os.path.relpath(file_path, path).encode("utf-8"))
+                h.update(digest_path(file_path).encode("utf-8"))
+        return h.hexdigest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def compute_fingerprint(
+    source: str | list[str], inputs: dict[str, str] = None, parameters: dict[str, Any] = None
+) -> str:
+    """Compute the fingerprint of a step.
+
+    Args:
+        source: The step's rendered source code (or list of code blocks)
+        inputs: A dict mapping input names to the paths of their artifacts
+        parameters: A dict mapping the consumed pipeline parameters to their
+            values
+
+    Returns (str): A hex digest that identifies the step's execution
+    """
+    payload = {
+        "source": source,
+        "inputs": {name: digest_path(path) for name, path in (inputs or {}).items()},
+        "parameters": {name: repr(value) for name, value in (parameters or {}).items()},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _find_entry(data_dir: str, basename: str) -> str:
+    # marshalled objects are saved as <basename>.<backend extension>
+    entries = [e for e in os.listdir(data_dir) if os.path.splitext(e)[0] == basename]
+    if len(entries) != 1:
+        raise RuntimeError(
+            f"Expected exactly one entry with basename '{basename}' in {data_dir}. Found: {entries}"
+        )
+    return entries[0]
+
+
+def _copy(src: str, dst: str):
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        shutil.copyfile(src, dst)
+
+
+class StepCache:
+    """Store and restore the marshalled outputs of pipeline steps.
+
+    Every cached execution lives under `<cache_dir>/<fingerprint>`, along
+    with a manifest that lists the cached outputs and the (JSON-serializable)
+    result of the step.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def fingerprint(
+        self,
+        source: str | list[str],
+        inputs: dict[str, str] = None,
+        parameters: dict[str, Any] = None,
+    ) -> str:
+        """Compute the fingerprint of a step. See `compute_fingerprint`."""
+        return compute_fingerprint(source, inputs, parameters)
+
+    def _entry_dir(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, fingerprint)
+
+    def lookup(self, fingerprint: str) -> dict | None:
+        """Return the manifest of a cached execution, None if not cached."""
+        manifest_path = os.path.join(self._entry_dir(fingerprint), CACHE_MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            return utils.read_json_from_file(manifest_path)
+        except json.JSONDecodeError:
+            return None
+
+    def restore(self, fingerprint: str, data_dir: str) -> dict | None:
+        """Copy the cached outputs of an execution into `data_dir`.
+
+        Returns (dict): The manifest of the cached execution, None if the
+            fingerprint is not cached.
+        """
+        manifest = self.lookup(fingerprint)
+        if manifest is None:
+            return None
+        os.makedirs(data_dir, exist_ok=True)
+        for basename, entry in manifest["outputs"].items():
+            # remove stale objects with the same name, possibly marshalled
+            # with a different backend
+            for stale in os.listdir(data_dir):
+                if os.path.splitext(stale)[0] == basename:
+                    utils.rm_r(os.path.join(data_dir, stale))
+            _copy(os.path.join(self._entry_dir(fingerprint), entry), os.path.join(data_dir, entry))
+        log.info("Restored cached outputs %s", list(manifest["outputs"]))
+        return manifest
+
+    def store(self, fingerprint: str, outputs: list[str], data_dir: str, result: Any = None):
+        """Save the marshalled `outputs` found in `data_dir` to the cache.
+
+        The entry is first written to a temporary directory and then moved in
+        place, so that concurrent readers never see a partial entry.
+        """
+        entry_dir = self._entry_dir(fingerprint)
+        tmp_dir = os.path.join(self.cache_dir, f".{fingerprint}.{utils.random_string()}.tmp")
+        try:
+            os.makedirs(tmp_dir)
+            manifest = {"outputs": {}, "result": result}
+            for basename in outputs:
+                entry = _find_entry(data_dir, basename)
+                _copy(os.path.join(data_dir, entry), os.path.join(tmp_dir, entry))
+                manifest["outputs"][basename] = entry
+            with open(os.path.join(tmp_dir, CACHE_MANIFEST_NAME), "w") as f:
+                json.dump(manifest, f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # another execution with the same fingerprint populated the cache
+            # in the meantime, or the store is not writable.
+            log.warning("Could not cache outputs with fingerprint %s", fingerprint, exc_info=True)
+        finally:
+            utils.rm_r(tmp_dir, silent=True)
+
+    def run(self, fingerprint: str, fn: Callable, outputs: list[str], data_dir: str) -> Any:
+        """Run `fn` unless an execution with the same fingerprint is cached.
+
+        Args:
+            fingerprint: The step's fingerprint
+            fn: A callable that executes the step and marshals its outputs
+                into `data_dir`
+            outputs: The basenames of the marshalled outputs of the step
+            data_dir: The marshal directory
+
+        Returns: The result of `fn`, or its cached value
+        """
+        manifest = self.restore(fingerprint, data_dir)
+        if manifest is not None:
+            log.info("Found cached execution %s. Skipping step execution.", fingerprint)
+            return manifest["result"]
+        log.info("No cached execution found for %s", fingerprint)
+        result = fn()
+        self.store(fingerprint, outputs, data_dir, result)
+        return result
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import inspect
+import itertools
 import json
 import logging
 import os
@@ -20,7 +23,6 @@ import re
 import signal
 import sys
 import threading
-import time
 
 import ipykernel
 from jupyter_client.kernelspec import get_kernel_spec
@@ -34,6 +36,15 @@ from kale.common.utils import remove_ansi_color_sequences
 
 log = logging.getLogger(__name__)
 
+# Seconds between two consecutive writes of the kernel's stream outputs
+STREAM_FLUSH_INTERVAL = 0.1
+# Number of characters that trigger a flush before the interval expires
+STREAM_MAX_BUFFER_SIZE = 64 * 1024
+# Number of messages buffered before the iopub reader blocks
+STREAM_MAX_QUEUE_SIZE = 1000
+# Max seconds to wait for the stream outputs to be flushed on shutdown
+STREAM_DRAIN_TIMEOUT = 5
+
 HTML_TEMPLATE = """
 <html><head>
     <style>
@@ -185,51 +196,157 @@ def process_outputs(cells):
     return html_artifact
 
 
+class StreamPump:
+    """Relay the stream and error outputs of a kernel to the current process.
+
+    Messages are pulled from the iopub channel of a kernel connection and
+    pushed into a bounded queue. A writer coroutine drains the queue,
+    coalescing consecutive messages, and writes them to stdout or stderr at
+    most every `flush_interval` seconds, or as soon as `max_buffer_size`
+    characters have been collected. When the writer falls behind, the reader
+    blocks on the full queue and stops pulling from the iopub channel, so
+    back-pressure is propagated to the kernel instead of piling up messages in
+    memory.
+
+    The pump runs its own event loop in a daemon thread (see `start`) so that
+    it can relay outputs while the main thread is blocked executing cells.
+    """
+
+    def __init__(
+        self,
+        kc,
+        exit_on_error: bool = False,
+        flush_interval: float = STREAM_FLUSH_INTERVAL,
+        max_buffer_size: int = STREAM_MAX_BUFFER_SIZE,
+        max_queue_size: int = STREAM_MAX_QUEUE_SIZE,
+    ):
+        self.kc = kc
+        self.exit_on_error = exit_on_error
+        self.flush_interval = flush_interval
+        self.max_buffer_size = max_buffer_size
+        self.max_queue_size = max_queue_size
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._queue = None
+
+    def start(self):
+        """Run the pump in a background daemon thread."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Drain the pending messages and wait for the pump to exit."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    async def run(self):
+        """Pump messages until the channel is drained after `stop`."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        writer = asyncio.create_task(self._write())
+        try:
+            await self._read()
+        finally:
+            await self._queue.put(None)
+            await writer
+
+    async def _get_msg(self):
+        get_msg = self.kc.iopub_channel.get_msg
+        if inspect.iscoroutinefunction(get_msg):
+            return await get_msg(timeout=self.flush_interval)
+        # blocking clients would stall the writer, poll them in a thread
+        return await asyncio.to_thread(get_msg, timeout=self.flush_interval)
+
+    async def _read(self):
+        while True:
+            try:
+                msg = await self._get_msg()
+            except Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+
+            msg_type = msg["header"]["msg_type"]
+            content = msg["content"]
+            if msg_type == "stream":  # stdout or stderr
+                if content["name"] not in ("stdout", "stderr"):
+                    raise NotImplementedError(
+                        "stream message content name not recognized: {}".format(content["name"])
+                    )
+                # blocks when the writer falls behind
+                await self._queue.put((content["name"], content["text"]))
+            if msg_type == "error":  # error and exceptions
+                # traceback is a list of strings (jupyter protocol spec)
+                if content["ename"] == KaleGracefulExit.__name__:
+                    log.error(f"Received a {KaleGracefulExit.__name__} exception. Exiting...")
+                    await self._queue.join()
+                    os.kill(os.getpid(), signal.SIGUSR1)
+                else:
+                    traceback = map(remove_ansi_color_sequences, content["traceback"])
+                    await self._queue.put(("stderr", "\n".join(traceback) + "\n"))
+                    if self.exit_on_error:
+                        # when receiving an error from the kernel, we don't
+                        # want to just print the exception to stderr,
+                        # otherwise the pipeline step would complete
+                        # successfully. Make sure the traceback is written
+                        # before signaling the main thread.
+                        await self._queue.join()
+                        os.kill(os.getpid(), signal.SIGUSR1)
+
+    async def _write(self):
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            item = await self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            size = len(item[1])
+            deadline = loop.time() + self.flush_interval
+            while size < self.max_buffer_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+                size += len(item[1])
+            self._flush(batch)
+            for _ in range(len(batch) + done):
+                self._queue.task_done()
+
+    @staticmethod
+    def _flush(batch):
+        # merge consecutive messages of the same stream, preserving the
+        # interleaving between stdout and stderr
+        streams = {"stdout": sys.stdout, "stderr": sys.stderr}
+        for name, group in itertools.groupby(batch, key=lambda x: x[0]):
+            streams[name].write("".join(text for _, text in group))
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
 async def capture_streams(kc, exit_on_error=False):
     """Capture stream and error outputs from a kernel connection.
 
     Get messages from the iopub channel of the `kc` kernel connection
-    and write to stdout or stderr any message of type `stream`.
-    Capture and exit when receiving an `error` message or when the message
-    queue is done.
+    and write to stdout or stderr any message of type `stream`, batching
+    them through a `StreamPump`. Capture and exit when receiving an `error`
+    message.
 
     Args:
         kc: kernel connection
         exit_on_error (bool): True to call sys.exit() when the kernel sends
             an error message.
     """
-    while True:
-        try:
-            msg = await kc.iopub_channel.get_msg()
-        except Empty:
-            print("The Kale kernel stream watcher thread raised an Empty exception, exiting...")
-            return
-
-        msg_type = msg["header"]["msg_type"]
-        content = msg["content"]
-        if msg_type == "stream":  # stdout or stderr
-            if content["name"] == "stdout":
-                sys.stdout.write(content["text"])
-            elif content["name"] == "stderr":
-                sys.stderr.write(content["text"])
-            else:
-                raise NotImplementedError(
-                    "stream message content name not recognized: {}".format(content["name"])
-                )
-        if msg_type == "error":  # error and exceptions
-            # traceback is a list of strings (jupyter protocol spec)
-            if content["ename"] == KaleGracefulExit.__name__:
-                log.error(f"Received a {KaleGracefulExit.__name__} exception. Exiting...")
-                os.kill(os.getpid(), signal.SIGUSR1)
-            else:
-                traceback = map(remove_ansi_color_sequences, content["traceback"])
-                sys.stderr.write("\n".join(traceback) + "\n")
-                if exit_on_error:
-                    # when receiving an error from the kernel, we don't want
-                    # to just print the exception to stderr, otherwise the
-                    # pipeline step would complete successfully.
-                    # kill sends the signal to the specific pid (main thread)
-                    os.kill(os.getpid(), signal.SIGUSR1)
+    await StreamPump(kc, exit_on_error).run()
 
 
 def run_code(source: tuple, kernel_name="python3"):
@@ -292,15 +409,7 @@ def run_code(source: tuple, kernel_name="python3"):
     signal.signal(signal.SIGUSR1, signal_handler)
     # start separate thread in to capture and print stdout, stderr, errors.
     # daemon mode will make the watcher thread die when the main one returns.
-    x = threading.Thread(
-        target=capture_streams,
-        args=(
-            kc,
-            True,
-        ),
-        daemon=True,
-    )
-    x.start()
+    pump = StreamPump(kc, exit_on_error=True).start()
 
     try:
         # start preprocessor: run each code cell and capture the output
@@ -311,9 +420,9 @@ def run_code(source: tuple, kernel_name="python3"):
         log.error("%s Failed to run user code %s", "-" * 10, "-" * 10)
         # exit gracefully with error
         sys.exit(-1)
-    # Give some time to the stream watcher thread to receive all messages from
+    # Let the stream watcher thread receive and flush all the messages from
     # the kernel before shutting down.
-    time.sleep(1)
+    pump.stop(timeout=STREAM_DRAIN_TIMEOUT)
     km.shutdown_kernel()
 
     result = process_outputs(notebook.cells)
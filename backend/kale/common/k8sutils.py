@@ -12,20 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""Shared, thread-safe Kubernetes API clients.
+
+All the API clients share a single `ApiClient`, so that they reuse the same
+pool of connections (and TLS sessions) instead of each opening their own. The
+size of the pool can be configured with the KALE_K8S_POOL_MAXSIZE env var.
+When the API server rejects the credentials (e.g. because the service account
+token was rotated), the configuration is reloaded and the request retried.
+"""
+
+import logging
+import os
+import threading
+
 import kubernetes
+from kubernetes.client.rest import ApiException
+
+log = logging.getLogger(__name__)
+
+KALE_K8S_POOL_MAXSIZE_ENV = "KALE_K8S_POOL_MAXSIZE"
 
 _k8s_watch = None
 _api_client = None
-_api_v1_client = None
-_k8s_co_client = None
+# API class -> API client instance
+_apis: dict[type, object] = {}
+_clients_lock = threading.Lock()
 
 
-def _load_config():
+def _load_config(client_configuration: kubernetes.client.Configuration = None):
     try:
-        kubernetes.config.load_incluster_config()
+        kubernetes.config.load_incluster_config(client_configuration=client_configuration)
     except kubernetes.config.ConfigException:  # Not in a notebook server
         try:
-            kubernetes.config.load_kube_config()
+            kubernetes.config.load_kube_config(client_configuration=client_configuration)
         # FIXME: `kubernetes` raises a TypeError when a `config` file is not
         #  found. This is fixed starting from version `11.0.0`, which raises
         #  the correct `ConfigException`. We cannot yet upgrade the package
@@ -36,25 +55,74 @@ def _load_config():
             )
 
 
+class _ApiClient(kubernetes.client.ApiClient):
+    """An ApiClient that reloads its credentials when they are rejected."""
+
+    _reload_lock = threading.Lock()
+
+    def call_api(self, *args, **kwargs):
+        try:
+            return super().call_api(*args, **kwargs)
+        except ApiException as e:
+            if e.status != 401:
+                raise
+        log.info("The Kubernetes credentials were rejected. Reloading them...")
+        with self._reload_lock:
+            # the connection pool is kept, only the credentials change
+            _load_config(self.configuration)
+        return super().call_api(*args, **kwargs)
+
+
+def _get_pool_maxsize() -> int | None:
+    value = os.getenv(KALE_K8S_POOL_MAXSIZE_ENV)
+    return int(value) if value else None
+
+
+def get_api_client(pool_maxsize: int = None) -> kubernetes.client.ApiClient:
+    """Get the ApiClient shared by all the Kubernetes API clients.
+
+    Args:
+        pool_maxsize: The maximum number of connections kept in the pool.
+            Only used when the client is first created. Defaults to the
+            KALE_K8S_POOL_MAXSIZE env var or to the `kubernetes` default.
+    """
+    global _api_client
+    with _clients_lock:
+        if _api_client is None:
+            configuration = kubernetes.client.Configuration()
+            _load_config(configuration)
+            pool_maxsize = pool_maxsize or _get_pool_maxsize()
+            if pool_maxsize:
+                configuration.connection_pool_maxsize = pool_maxsize
+            _api_client = _ApiClient(configuration)
+        return _api_client
+
+
+def _get_api(api_cls):
+    api_client = get_api_client()
+    with _clients_lock:
+        api = _apis.get(api_cls)
+        if api is None:
+            api = _apis[api_cls] = api_cls(api_client)
+        return api
+
+
+def reset_clients():
+    """Drop the shared clients, so that they are recreated on next use."""
+    global _api_client
+    with _clients_lock:
+        _api_client = None
+        _apis.clear()
+
+
 def get_v1_client():
     """Get the Kubernetes V1 ApiClient."""
-    global _api_client
-    global _api_v1_client
-    if not _api_client:
-        _load_config()
-        _api_client = kubernetes.client.ApiClient()
-    if not _api_v1_client:
-        _api_v1_client = kubernetes.client.CoreV1Api(_api_client)
-    return _api_v1_client
+    return _get_api(kubernetes.client.CoreV1Api)
 
 
 def get_co_client():
     """Get the K8s client to interact with the custom objects API."""
-    global _k8s_co_client
-    if not _k8s_co_client:
-        _load_config()
-        _k8s_co_client = kubernetes.client.CustomObjectsApi()
-    return _k8s_co_client
+    return _get_api(kubernetes.client.CustomObjectsApi)
 
 
 def annotate_object(group, version, plural, name, namespace, annotations):
@@ -14,11 +14,16 @@
 
 """Suite of helpers for Katib."""
 
+import asyncio
 import copy
+from functools import cache
+import json
 import logging
 import os
 import sys
+import threading
 
+import kubernetes
 from kubernetes.client.rest import ApiException
 
 from kale.common import k8sutils, kfputils, podutils, workflowutils
@@ -39,6 +44,10 @@ TRIAL_ID_ANNOTATION_KEY = "kubeflow.org/katib-trial-id"
 
 KALE_KATIB_KFP_ANNOTATION_KEY = "kubeflow-kale.org/kfp-run-uuid"
 
+# How often (in seconds) the watch of the intermediate metrics is restarted,
+# which bounds how long it takes to stop relaying them
+INTERMEDIATE_METRICS_WATCH_TIMEOUT = 5
+
 TRIAL_IMAGE_ENV = "KALE_KATIB_KFP_TRIAL_IMAGE"
 TRIAL_IMAGE = "gcr.io/arrikto/katib-kfp-trial:a7f7bb79-d9bf99ac"
 TRIAL_SA = "pipeline-runner"
@@ -149,34 +158,102 @@ def create_and_wait_kfp_run(
     Returns:
         metrics: Dict of metrics along with their values
     """
+    return asyncio.run(
+        _create_and_wait_kfp_run(
+            pipeline_id, version_id, run_name, experiment_name, api_version, **kwargs
+        )
+    )
+
+
+async def _create_and_wait_kfp_run(
+    pipeline_id, version_id, run_name, experiment_name, api_version, **kwargs
+):
+    # The K8s and KFP clients are blocking, so every call runs in a worker
+    # thread and the independent ones are awaited concurrently.
     pod_namespace = podutils.get_namespace()
-    run = kfputils.run_pipeline(
+    run = await asyncio.to_thread(
+        kfputils.run_pipeline,
         experiment_name=experiment_name,
         pipeline_id=pipeline_id,
         version_id=version_id,
         run_name=run_name,
         **kwargs,
     )
-    run_id = run.id
+    run_id = run.run_id
+
+    # Start watching the run right away, while annotating the resources.
+    # Annotation failures are logged and do not fail the trial, since the
+    # worker thread of the watch cannot be cancelled.
+    wait = asyncio.create_task(
+        asyncio.to_thread(kfputils.wait_kfp_run, run_id, watch_namespace=pod_namespace)
+    )
+    stop_relay = threading.Event()
+    relay = asyncio.create_task(
+        asyncio.to_thread(relay_intermediate_metrics, run_id, pod_namespace, stop_relay)
+    )
+    await asyncio.gather(
+        _annotate_trial_with_run(run_name, pod_namespace, run_id, api_version),
+        _annotate_workflow_with_trial(run_name, pod_namespace, run_id, api_version),
+    )
+    try:
+        status = await wait
+    finally:
+        stop_relay.set()
+        await relay
+
+    # If run has not succeeded, return no metrics
+    if status != "Succeeded":
+        log.warning("KFP run did not run successfully. No metrics to return.")
+        # exit gracefully with error
+        sys.exit(-1)
+
+    # Retrieve metrics
+    run_metrics = await asyncio.to_thread(kfputils.get_kfp_run_metrics, run_id)
+    for name, value in run_metrics.items():
+        log.info("%s=%s", name, value)
 
-    log.info("Annotating Trial '%s' with the KFP Run UUID '%s'...", run_name, run_id)
+    return run_metrics
+
+
+async def _annotate_trial_with_run(trial_name, namespace, run_id, api_version):
+    log.info("Annotating Trial '%s' with the KFP Run UUID '%s'...", trial_name, run_id)
     try:
         # Katib Trial name == KFP Run name by design (see rpc.katib)
-        annotate_trial(
-            run_name, pod_namespace, {KALE_KATIB_KFP_ANNOTATION_KEY: run_id}, api_version
+        await asyncio.to_thread(
+            annotate_trial,
+            trial_name,
+            namespace,
+            {KALE_KATIB_KFP_ANNOTATION_KEY: run_id},
+            api_version,
         )
     except Exception:
-        log.exception("Failed to annotate Trial '%s' with the KFP Run UUID '%s'", run_name, run_id)
+        log.exception(
+            "Failed to annotate Trial '%s' with the KFP Run UUID '%s'", trial_name, run_id
+        )
 
+
+async def _get_workflow_name(run_id):
     log.info("Getting Workflow name for run '%s'...", run_id)
-    workflow_name = kfputils.get_workflow_from_run(kfputils.get_run(run_id))["metadata"]["name"]
+    run = await asyncio.to_thread(kfputils.get_run, run_id)
+    workflow_name = kfputils.get_workflow_from_run(run)["metadata"]["name"]
     log.info("Workflow name: %s", workflow_name)
+    return workflow_name
+
+
+async def _annotate_workflow_with_trial(trial_name, namespace, run_id, api_version):
     log.info("Getting the Katib trial...")
-    trial = get_trial(run_name, pod_namespace, api_version)
-    log.info("Trial name: %s, UID: %s", trial["metadata"]["name"], trial["metadata"]["uid"])
-    log.info("Getting owner Katib experiment of trial...")
-    exp_name, exp_id = get_owner_experiment_from_trial(trial)
-    log.info("Experiment name: %s, UID: %s", exp_name, exp_id)
+    try:
+        workflow_name, trial = await asyncio.gather(
+            _get_workflow_name(run_id),
+            asyncio.to_thread(get_trial, trial_name, namespace, api_version),
+        )
+        log.info("Trial name: %s, UID: %s", trial["metadata"]["name"], trial["metadata"]["uid"])
+        log.info("Getting owner Katib experiment of trial...")
+        exp_name, exp_id = get_owner_experiment_from_trial(trial)
+        log.info("Experiment name: %s, UID: %s", exp_name, exp_id)
+    except Exception:
+        log.exception("Failed to retrieve the Katib details of run '%s'", run_id)
+        return
     wf_annotations = {
         EXPERIMENT_NAME_ANNOTATION_KEY: exp_name,
         EXPERIMENT_ID_ANNOTATION_KEY: exp_id,
@@ -184,24 +261,74 @@ def create_and_wait_kfp_run(
         TRIAL_ID_ANNOTATION_KEY: trial["metadata"]["uid"],
     }
     try:
-        workflowutils.annotate_workflow(workflow_name, pod_namespace, wf_annotations)
+        await asyncio.to_thread(
+            workflowutils.annotate_workflow, workflow_name, namespace, wf_annotations
+        )
     except Exception:
         log.exception("Failed to annotate Workflow '%s' with the Katib details", workflow_name)
 
-    status = kfputils.wait_kfp_run(run_id)
 
-    # If run has not succeeded, return no metrics
-    if status != "Succeeded":
-        log.warning("KFP run did not run successfully. No metrics to return.")
-        # exit gracefully with error
-        sys.exit(-1)
+def relay_intermediate_metrics(
+    run_id: str,
+    namespace: str,
+    stop: threading.Event,
+    watch_timeout: int = INTERMEDIATE_METRICS_WATCH_TIMEOUT,
+):
+    """Log the intermediate metrics of a KFP run as they are published.
 
-    # Retrieve metrics
-    run_metrics = kfputils.get_kfp_run_metrics(run_id)
-    for name, value in run_metrics.items():
-        log.info("%s=%s", name, value)
+    Watch the pods of the run for the metrics published by the steps with
+    `kfputils.publish_intermediate_metrics` and log every new value in the
+    `<name>=<value>` format that is parsed by Katib's metrics collector.
 
-    return run_metrics
+    Args:
+        run_id: The ID of the KFP run
+        namespace: The namespace of the run's pods
+        stop: Event that stops the relay when set
+        watch_timeout: Maximum number of seconds to wait for the stop event
+            to be noticed
+    """
+    v1_client = k8sutils.get_v1_client()
+    label_selector = f"{kfputils.KFP_RUN_ID_LABEL_KEY}={run_id}"
+    # pod name -> sequence number of the last relayed metrics
+    relayed = {}
+    while not stop.is_set():
+        watcher = kubernetes.watch.Watch()
+        try:
+            for event in watcher.stream(
+                v1_client.list_namespaced_pod,
+                namespace,
+                label_selector=label_selector,
+                timeout_seconds=watch_timeout,
+            ):
+                _relay_pod_metrics(event["object"], relayed)
+                if stop.is_set():
+                    watcher.stop()
+        except Exception:
+            log.warning("Stopped relaying the intermediate metrics", exc_info=True)
+            return
+
+
+def _relay_pod_metrics(pod, relayed: dict[str, int]):
+    annotations = pod.metadata.annotations or {}
+    annotation = annotations.get(kfputils.KFP_INTERMEDIATE_METRICS_ANNOTATION_KEY)
+    if not annotation:
+        return
+    try:
+        payload = json.loads(annotation)
+    except ValueError:
+        payload = None
+    if not (
+        isinstance(payload, dict)
+        and isinstance(payload.get("seq"), int)
+        and isinstance(payload.get("metrics"), dict)
+    ):
+        log.warning("Invalid intermediate metrics in pod '%s'", pod.metadata.name)
+        return
+    if payload["seq"] <= relayed.get(pod.metadata.name, 0):
+        return
+    relayed[pod.metadata.name] = payload["seq"]
+    for name, value in payload["metrics"].items():
+        log.info("%s=%s", name, value)
 
 
 def annotate_trial(name, namespace, annotations, api_version=KATIB_API_VERSION_V1BETA1):
@@ -358,26 +485,38 @@ def list_experiments(namespace, api_version=KATIB_API_VERSION_V1BETA1):
     return ret
 
 
-def discover_katib_version():
-    """Retrieve the installed Katib version."""
-    log.info("Discovering Katib version...")
-    ns = podutils.get_namespace()
-    api_version = KATIB_API_VERSION_V1BETA1
+def _is_katib_version_served(api_version) -> bool:
+    """Check the API server serves Katib Experiments at a CRD version."""
+    k8s_co_client = k8sutils.get_co_client()
     try:
-        list_experiments(ns, api_version)
+        resources = k8s_co_client.get_api_resources(KATIB_API_GROUP, api_version)
     except ApiException as e:
-        if e.status != 403:
-            api_version = KATIB_API_VERSION_V1ALPHA3
-            try:
-                list_experiments(ns, api_version)
-            except ApiException as e:
-                if e.status != 403:
-                    raise RuntimeError(
-                        "Katib is not installed or has an"
-                        " unsupported CRD version. Supported"
-                        " CRD versions are 'v1alpha3' and"
-                        " 'v1beta1'."
-                    )
-
-    log.info("Found Katib version %s", api_version)
-    return api_version
+        if e.status == 404:
+            return False
+        if e.status == 403:
+            # not allowed to discover the group version, assume it is there
+            return True
+        raise
+    # other operators (e.g. the training operator) share the API group
+    return any(r.name == KATIB_EXPERIMENTS_PLURAL for r in resources.resources or [])
+
+
+@cache
+def discover_katib_version():
+    """Retrieve the installed Katib version.
+
+    Use the API discovery endpoint of every supported CRD version, instead of
+    listing Experiments, and cache the result for the lifetime of the
+    process.
+    """
+    log.info("Discovering Katib version...")
+    for api_version in (KATIB_API_VERSION_V1BETA1, KATIB_API_VERSION_V1ALPHA3):
+        if _is_katib_version_served(api_version):
+            log.info("Found Katib version %s", api_version)
+            return api_version
+    raise RuntimeError(
+        "Katib is not installed or has an"
+        " unsupported CRD version. Supported"
+        " CRD versions are 'v1alpha3' and"
+        " 'v1beta1'."
+    )
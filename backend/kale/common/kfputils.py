@@ -12,18 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache
 import hashlib
-import importlib.util
+from http import HTTPStatus
 import json
+import linecache
 import logging
 import os
-from shutil import copyfile
-import tempfile
+import random
+import threading
 import time
 from typing import Any
 
 import kfp
+import kfp_server_api
 
 from kale.common import podutils, utils, workflowutils
 
@@ -31,21 +34,69 @@ KFP_RUN_ID_LABEL_KEY = "pipeline/runid"
 KFP_RUN_NAME_ANNOTATION_KEY = "pipelines.kubeflow.org/run_name"
 KFP_COMPONENT_SPEC_ANNOTATION_KEY = "pipelines.kubeflow.org/component_spec"
 KFP_SWF_NAME_ANNOTATION_KEY = "scheduledworkflows.kubeflow.org/scheduledWorkflowName"
-KFP_RUN_FINAL_STATES = ["Succeeded", "Skipped", "Failed", "Error"]
+KFP_RUN_FINAL_STATES = ["Succeeded", "Skipped", "Failed", "Error", "Canceled"]
+# Polling intervals (in seconds) used while waiting for a run to complete
+KFP_RUN_POLL_INITIAL_INTERVAL = 1
+KFP_RUN_POLL_MAX_INTERVAL = 30
 KFP_UI_METADATA_FILE_PATH = "/tmp/mlpipeline-ui-metadata.json"
 KFP_UI_METRICS_FILE_PATH = "/tmp/mlpipeline-metrics.json"
+KFP_INTERMEDIATE_METRICS_ANNOTATION_KEY = "kubeflow-kale.org/intermediate-metrics"
+# How long (in seconds) the IDs resolved by name are cached for
+KFP_LOOKUP_CACHE_TTL = 30
+# Maximum number of runs submitted concurrently by `run_pipelines`
+KFP_RUN_SUBMIT_MAX_WORKERS = 8
 
 _logger = None
 
 log = logging.getLogger(__name__)
 
+_kfp_clients: dict[tuple[str, str], kfp.Client] = {}
+_kfp_clients_lock = threading.Lock()
+# (kind, host, *names) -> (timestamp, ID)
+_lookup_cache: dict[tuple, tuple[float, str]] = {}
+_intermediate_metrics_seq = 0
+_intermediate_metrics_lock = threading.Lock()
+
+
+def get_kfp_client(host=None, namespace: str = "kubeflow"):
+    """Get a KFP client, shared by all the callers using the same host."""
+    # Creating a client loads the kube config and sets up a new connection
+    # pool, so reuse the same client for every host.
+    with _kfp_clients_lock:
+        client = _kfp_clients.get((host, namespace))
+        if client is None:
+            client = kfp.Client(host=host, namespace=namespace)
+            _kfp_clients[(host, namespace)] = client
+        return client
+
+
+def _name_filter(name: str) -> str:
+    return json.dumps(
+        {"predicates": [{"operation": "EQUALS", "key": "display_name", "stringValue": name}]}
+    )
+
+
+def _cached_lookup(key: tuple, lookup) -> str | None:
+    cached = _lookup_cache.get(key)
+    if cached and time.monotonic() - cached[0] < KFP_LOOKUP_CACHE_TTL:
+        return cached[1]
+    value = lookup()
+    # don't cache misses, the resource could be created any moment
+    if value is not None:
+        _lookup_cache[key] = (time.monotonic(), value)
+    return value
+
 
-def _get_kfp_client(host=None, namespace: str = "kubeflow"):
-    return kfp.Client(host=host, namespace=namespace)
+def clear_lookup_cache():
+    """Clear the cache of the pipeline and version IDs resolved by name."""
+    _lookup_cache.clear()
 
 
 def get_pipeline_id(pipeline_name: str, host: str = None) -> str:
-    """List through the existing pipelines and filter by pipeline name.
+    """Get the ID of a pipeline by name.
+
+    The KFP server filters the pipelines by name and the result is cached
+    for KFP_LOOKUP_CACHE_TTL seconds.
 
     Args:
         pipeline_name: name of the pipeline
@@ -54,20 +105,20 @@ def get_pipeline_id(pipeline_name: str, host: str = None) -> str:
     Returns:
         The matching pipeline id. None if not found
     """
-    client = _get_kfp_client(host)
-    token = ""
-    pipeline_id = None
-    while pipeline_id is None and token is not None:
-        pipelines = client.list_pipelines(page_token=token)
-        token = pipelines.next_page_token
-        f = next(filter(lambda x: x.display_name == pipeline_name, pipelines.pipelines or []), None)
-        if f is not None:
-            pipeline_id = f.pipeline_id
-    return pipeline_id
+
+    def _lookup():
+        client = get_kfp_client(host)
+        pipelines = client.list_pipelines(page_size=1, filter=_name_filter(pipeline_name))
+        return pipelines.pipelines[0].pipeline_id if pipelines.pipelines else None
+
+    return _cached_lookup(("pipeline", host, pipeline_name), _lookup)
 
 
 def get_pipeline_version_id(version_name: str, pipeline_id: str, host: str = None) -> str:
-    """List through the versions and filter by version name.
+    """Get the ID of a pipeline version by name.
+
+    The KFP server filters the versions by name and the result is cached
+    for KFP_LOOKUP_CACHE_TTL seconds.
 
     Args:
         version_name: name of the version
@@ -77,38 +128,54 @@ def get_pipeline_version_id(version_name: str, pipeline_id: str, host: str = Non
     Returns:
         The matching pipeline id. None if not found
     """
-    client = _get_kfp_client(host)
-    page_token = ""
-    version_id = None
-    while version_id is None and page_token is not None:
-        versions = client.pipelines.list_pipeline_versions(
-            resource_key_type="PIPELINE", resource_key_id=pipeline_id, page_token=page_token
+
+    def _lookup():
+        client = get_kfp_client(host)
+        versions = client.list_pipeline_versions(
+            pipeline_id=pipeline_id, page_size=1, filter=_name_filter(version_name)
         )
-        page_token = versions.next_page_token
-        f = next(filter(lambda x: x.name == version_name, versions.versions), None)
-        if f is not None:
-            version_id = f.id
-    return version_id
+        if not versions.pipeline_versions:
+            return None
+        return versions.pipeline_versions[0].pipeline_version_id
+
+    return _cached_lookup(("version", host, pipeline_id, version_name), _lookup)
 
 
 def compile_pipeline(pipeline_source: str, pipeline_name: str) -> str:
     """Read in the generated python script and compile it to a KFP package."""
-    # create a tmp folder
-    tmp_dir = tempfile.mkdtemp()
-    # copy generated script to temp dir
-    copyfile(pipeline_source, tmp_dir + "/" + "pipeline_code.py")
-
-    path = tmp_dir + "/" + "pipeline_code.py"
-    spec = importlib.util.spec_from_file_location(tmp_dir.split("/")[-1], path)
-    foo = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(foo)
-
+    with open(pipeline_source) as f:
+        source = f.read()
     # path to generated pipeline package
     pipeline_package = os.path.join(
         os.path.dirname(pipeline_source), pipeline_name + ".pipeline.yaml"
     )
-    kfp.compiler.Compiler().compile(foo.auto_generated_pipeline, pipeline_package)
-    return pipeline_package
+    return compile_pipeline_source(source, pipeline_package, filename=pipeline_source)
+
+
+def compile_pipeline_source(source: str, package_path: str, filename: str = None) -> str:
+    """Compile generated KFP DSL code to a KFP package, in memory.
+
+    The code is executed in a fresh namespace, instead of being imported as a
+    module. KFP reads the source of the components through `linecache`, so
+    the code is registered there for the duration of the compilation.
+
+    Args:
+        source: The generated KFP DSL code
+        package_path: Path to the output KFP package
+        filename: Name the code is compiled with, shown in tracebacks
+
+    Returns: The path to the KFP package
+    """
+    filename = filename or "<kale-pipeline>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    try:
+        # don't use `__main__` as name, so the script's main block is skipped
+        namespace = {"__name__": "kale_pipeline"}
+        exec(compile(source, filename, "exec"), namespace)
+        kfp.compiler.Compiler().compile(namespace["auto_generated_pipeline"], package_path)
+    finally:
+        linecache.cache.pop(filename, None)
+    return package_path
 
 
 def upload_pipeline(
@@ -124,42 +191,48 @@ def upload_pipeline(
         host: custom host when executing outside of the cluster
     Returns: (pipeline_id, version_id)
     """
-    client = _get_kfp_client(host)
+    client = get_kfp_client(host)
     log.info("Uploading pipeline '%s'...", pipeline_name)
     pipeline_id = get_pipeline_id(pipeline_name, host=host)
-    version_name = utils.random_string()
     if not pipeline_id:
-        # The first version of the pipeline is set to the pipeline name value.
-        # To work around this, upload the first pipeline, then another one
-        # with a proper version name. Finally delete the original pipeline.
-        upp = client.upload_pipeline(
-            pipeline_package_path=pipeline_package_path, pipeline_name=pipeline_name
-        )
-        pipeline_id = upp.pipeline_id
-        log.info("Uploaded Pipeline '%s' id: %s", pipeline_name, pipeline_id)
-        upv = client.upload_pipeline_version(
-            pipeline_package_path=pipeline_package_path,
-            pipeline_version_name=version_name,
-            pipeline_id=pipeline_id,
-        )
-        # delete the first version which has the same name as the pipeline
-        versions = client.list_pipeline_versions(pipeline_id=pipeline_id)
-        sorted_versions = sorted(versions.pipeline_versions, key=lambda v: v.created_at)
-        delete_vid = sorted_versions[0].pipeline_version_id
-        client.delete_pipeline_version(pipeline_id=pipeline_id, pipeline_version_id=delete_vid)
-        log.info(
-            "Deleted pipeline version with name '%s' and ID: %s", pipeline_name, upp.pipeline_id
-        )
-    else:
-        upv = client.upload_pipeline_version(
-            pipeline_package_path=pipeline_package_path,
-            pipeline_version_name=version_name,
-            pipeline_id=pipeline_id,
-        )
+        try:
+            return _upload_new_pipeline(client, pipeline_package_path, pipeline_name, host)
+        except kfp_server_api.ApiException as e:
+            if e.status != HTTPStatus.CONFLICT:
+                raise
+            # somebody else created the pipeline in the meantime
+            log.info("Pipeline '%s' already exists. Uploading a new version.", pipeline_name)
+            clear_lookup_cache()
+            pipeline_id = get_pipeline_id(pipeline_name, host=host)
+    version_name = utils.random_string()
+    upv = client.upload_pipeline_version(
+        pipeline_package_path=pipeline_package_path,
+        pipeline_version_name=version_name,
+        pipeline_id=pipeline_id,
+    )
     log.info("Successfully uploaded version '%s' for pipeline '%s'.", version_name, pipeline_name)
     return pipeline_id, upv.pipeline_version_id
 
 
+def _upload_new_pipeline(
+    client: kfp.Client, pipeline_package_path: str, pipeline_name: str, host: str = None
+) -> tuple[str, str]:
+    # Uploading a pipeline also creates its first version, which KFP names
+    # after the pipeline. Use that version instead of uploading the package
+    # again under a different name and deleting the first one.
+    upp = client.upload_pipeline(
+        pipeline_package_path=pipeline_package_path, pipeline_name=pipeline_name
+    )
+    pipeline_id = upp.pipeline_id
+    versions = client.list_pipeline_versions(pipeline_id=pipeline_id, page_size=1)
+    version_id = versions.pipeline_versions[0].pipeline_version_id
+    _lookup_cache[("pipeline", host, pipeline_name)] = (time.monotonic(), pipeline_id)
+    log.info(
+        "Uploaded Pipeline '%s' id: %s, version id: %s", pipeline_name, pipeline_id, version_id
+    )
+    return pipeline_id, version_id
+
+
 def run_pipeline(
     experiment_name: str,
     pipeline_id: str,
@@ -181,22 +254,11 @@ def run_pipeline(
     Returns:
         Pipeline run metadata
     """
-    client = _get_kfp_client(host)
+    client = get_kfp_client(host)
     log.info("Creating KFP experiment '%s'...", experiment_name)
     client.create_experiment(experiment_name)
-    pipeline = client.get_pipeline(pipeline_id)
-    pipeline_name = pipeline.display_name
-
-    try:
-        if version_id:
-            version_name = client.get_pipeline_version(
-                pipeline_id=pipeline_id, pipeline_version_id=version_id
-            ).display_name
-        else:
-            version_name = "default"
-    except Exception:
-        log.debug("Could not retrieve pipeline version with ID '%s'. Using 'unknown'.", version_id)
-        version_name = "unknown"
+    pipeline_name = client.get_pipeline(pipeline_id).display_name
+    version_name = _get_version_name(client, pipeline_id, version_id)
 
     if not run_name:
         run_name = f"{pipeline_name}-{version_name}-{utils.random_string()}"
@@ -223,6 +285,81 @@ def run_pipeline(
     return run
 
 
+def _get_version_name(client: kfp.Client, pipeline_id: str, version_id: str = None) -> str:
+    if not version_id:
+        return "default"
+    try:
+        return client.get_pipeline_version(
+            pipeline_id=pipeline_id, pipeline_version_id=version_id
+        ).display_name
+    except Exception:
+        log.debug("Could not retrieve pipeline version with ID '%s'. Using 'unknown'.", version_id)
+        return "unknown"
+
+
+def run_pipelines(
+    experiment_name: str,
+    pipeline_id: str,
+    arguments: list[dict[str, Any]],
+    version_id: str = None,
+    host: str = None,
+    run_name_prefix: str = None,
+    max_workers: int = KFP_RUN_SUBMIT_MAX_WORKERS,
+) -> list:
+    """Submit a batch of runs of an uploaded pipeline in kfp.
+
+    The experiment, pipeline and version are resolved once for the whole
+    batch and every run references the uploaded pipeline version, so that
+    the pipeline package is not sent again with each run. Useful to submit
+    parameter sweeps.
+
+    Args:
+        experiment_name: The name of the kfp experiment
+        pipeline_id: The ID of the uploaded pipeline to be run
+        arguments: A list of dicts with the pipeline arguments of each run
+        version_id: The ID of the pipeline version to be run (the pipeline's
+            default version if not provided)
+        host: custom host when executing outside of the cluster
+        run_name_prefix: The prefix of the runs' names (autogenerated if not
+            provided)
+        max_workers: The maximum number of runs submitted concurrently
+
+    Returns:
+        The runs' metadata, in the same order as `arguments`
+    """
+    if not arguments:
+        return []
+    client = get_kfp_client(host)
+    log.info("Creating KFP experiment '%s'...", experiment_name)
+    experiment_id = client.create_experiment(experiment_name).experiment_id
+    pipeline_name = client.get_pipeline(pipeline_id).display_name
+    version_name = _get_version_name(client, pipeline_id, version_id)
+    if not run_name_prefix:
+        run_name_prefix = f"{pipeline_name}-{version_name}-{utils.random_string()}"
+
+    def _submit(index: int, run_arguments: dict[str, Any]):
+        return client.run_pipeline(
+            experiment_id,
+            f"{run_name_prefix}-{index}",
+            params=run_arguments,
+            pipeline_id=pipeline_id,
+            version_id=version_id,
+        )
+
+    log.info(
+        "Submitting %d runs for pipeline '%s' (version: '%s') ...",
+        len(arguments),
+        pipeline_name,
+        version_name,
+    )
+    workers = max(1, min(max_workers, len(arguments)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        runs = list(executor.map(_submit, range(len(arguments)), arguments))
+    log.info("Successfully submitted %d pipeline runs.", len(runs))
+    log.debug("Run IDs: %s", [run.run_id for run in runs])
+    return runs
+
+
 def get_current_uimetadata(uimetadata_path=KFP_UI_METADATA_FILE_PATH, default_if_not_exist=False):
     """Parse the current UI metadata file and return its contents as dict.
 
@@ -289,14 +426,8 @@ def update_uimetadata(artifact_name, uimetadata_path=KFP_UI_METADATA_FILE_PATH):
     log.info("Artifact successfully added")
 
 
-def generate_mlpipeline_metrics(metrics):
-    """Generate a KFP_UI_METRICS_FILE_PATH file.
-
-    Args:
-        metrics (dict): a dictionary where the key is the metric name and the
-            value is its value.
-    """
-    metadata = []
+def _get_numeric_metrics(metrics: dict[str, Any]) -> dict[str, int | float]:
+    values = {}
     for name, value in metrics.items():
         if not isinstance(value, (int, float)):
             try:
@@ -308,13 +439,25 @@ def generate_mlpipeline_metrics(metrics):
                     " pipeline metrics"
                 )
                 continue
-        metadata.append(
-            {
-                "name": name,
-                "numberValue": value,
-                "format": "RAW",
-            }
-        )
+        values[name] = value
+    return values
+
+
+def generate_mlpipeline_metrics(metrics):
+    """Generate a KFP_UI_METRICS_FILE_PATH file.
+
+    Args:
+        metrics (dict): a dictionary where the key is the metric name and the
+            value is its value.
+    """
+    metadata = [
+        {
+            "name": name,
+            "numberValue": value,
+            "format": "RAW",
+        }
+        for name, value in _get_numeric_metrics(metrics).items()
+    ]
 
     try:
         utils.ensure_or_create_dir(KFP_UI_METRICS_FILE_PATH)
@@ -328,13 +471,46 @@ def generate_mlpipeline_metrics(metrics):
         json.dump({"metrics": metadata}, f)
 
 
+def publish_intermediate_metrics(metrics: dict[str, Any]):
+    """Publish the metrics of a step while it is still running.
+
+    The metrics are saved in an annotation of the step's pod, along with an
+    increasing sequence number, so that watchers of the run's pods receive
+    them as they are reported. Katib trials relay them to Katib's metrics
+    collector (see `katibutils.relay_intermediate_metrics`), which allows
+    early-stopping algorithms to stop unpromising trials.
+
+    Publishing is best effort: failures are logged and never fail the step.
+
+    Args:
+        metrics (dict): a dictionary where the key is the metric name and the
+            value is its value.
+    """
+    global _intermediate_metrics_seq
+    values = _get_numeric_metrics(metrics)
+    if not values:
+        return
+    with _intermediate_metrics_lock:
+        _intermediate_metrics_seq += 1
+        payload = {"seq": _intermediate_metrics_seq, "timestamp": time.time(), "metrics": values}
+        patch = {
+            "metadata": {
+                "annotations": {KFP_INTERMEDIATE_METRICS_ANNOTATION_KEY: json.dumps(payload)}
+            }
+        }
+        try:
+            podutils.patch_pod(podutils.get_pod_name(), podutils.get_namespace(), patch)
+        except Exception:
+            log.warning("Failed to publish intermediate metrics %s", values, exc_info=True)
+
+
 def get_experiment_from_run_id(run_id: str):
     """Retrieve the experiment in which a run belongs.
 
     Returns: ApiExperiment - the KFP Experiment which owns the run
     """
     log.info("Getting experiment from run with ID '%s'...", run_id)
-    client = _get_kfp_client()
+    client = get_kfp_client()
     run = client.runs.get_run(run_id=run_id).run
     experiment_id = None
     type_experiment = client.api_models.ApiResourceType.EXPERIMENT
@@ -350,55 +526,93 @@ def get_experiment_from_run_id(run_id: str):
 
 def get_run(run_id: str, host: str = None):
     """Retrieve KFP run based on RunID."""
-    client = _get_kfp_client(host)
+    client = get_kfp_client(host)
     return client.get_run(run_id)
 
 
-def wait_kfp_run(run_id: str):
+def _backoff_intervals(initial: float, maximum: float, factor: float = 2, jitter: float = 0.1):
+    """Generate exponentially growing sleep intervals with random jitter."""
+    interval = initial
+    while True:
+        yield min(interval * random.uniform(1 - jitter, 1 + jitter), maximum)
+        interval = min(interval * factor, maximum)
+
+
+def get_run_status(run) -> str:
+    """Get the status of a KFP run, e.g. 'Succeeded'."""
+    # KFP v2 reports states in upper case (e.g. SUCCEEDED)
+    return (run.state or "").capitalize()
+
+
+def wait_kfp_run(
+    run_id: str,
+    host: str = None,
+    max_interval: float = KFP_RUN_POLL_MAX_INTERVAL,
+    timeout: float = None,
+    watch_namespace: str = None,
+):
     """Wait for a KFP run to complete.
 
+    The run is polled with exponentially growing intervals (with jitter),
+    capped to `max_interval`, so that short runs are detected right away
+    without hammering the API server during long ones.
+
     Args:
         run_id: ID of the created KFP run
+        host: custom host when executing outside of the cluster
+        max_interval: Maximum number of seconds between two polls
+        timeout: Maximum number of seconds to wait for. Wait forever if None
+        watch_namespace: If set, first watch the run's Argo Workflow in this
+            namespace through the K8s watch API, to be notified as soon as
+            it completes
 
     Returns:
         status: Status of KFP run upon completion
     """
     log.info("Watching for Run with ID: '%s'", run_id)
-    while True:
-        time.sleep(30)
-        run = get_run(run_id)
-        status = run.run.status
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if watch_namespace:
+        try:
+            phase = workflowutils.watch_workflow_completion(
+                watch_namespace, f"{KFP_RUN_ID_LABEL_KEY}={run_id}", timeout
+            )
+            log.info("Workflow of run '%s' completed with phase: %s", run_id, phase)
+        except Exception:
+            log.warning("Could not watch the workflow of run '%s'. Polling.", run_id, exc_info=True)
+
+    for interval in _backoff_intervals(KFP_RUN_POLL_INITIAL_INTERVAL, max_interval):
+        status = get_run_status(get_run(run_id, host))
         log.info("Run status: %s", status)
-        if status not in KFP_RUN_FINAL_STATES:
-            continue
-        return status
+        if status in KFP_RUN_FINAL_STATES:
+            return status
+        if deadline is not None and time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Run '{run_id}' did not complete in {timeout} seconds")
+        time.sleep(interval)
 
 
-def get_kfp_run_metrics(run_id: str):
+def get_kfp_run_metrics(run_id: str, host: str = None, max_tries: int = 3):
     """Retrieve output metrics of a KFP run.
 
-    We sleep() and try multiple times to make sure that the KFP persistence
+    We try multiple times, backing off, to make sure that the KFP persistence
     agent has reported run metrics.
 
     Args:
         run_id: ID of the created KFP run
+        host: custom host when executing outside of the cluster
+        max_tries: Number of attempts before giving up
     Returns:
         metrics: Dict of metrics along with their values
     """
-    run_metrics = None
-    max_tries = 3
-    tries = 0
-    while not run_metrics:
-        if tries >= max_tries:
-            return {}
-        time.sleep(5)
+    intervals = _backoff_intervals(KFP_RUN_POLL_INITIAL_INTERVAL, KFP_RUN_POLL_MAX_INTERVAL)
+    for tries in range(max_tries):
         log.info("Try %d: Checking for run metrics...", tries)
-        run = get_run(run_id=run_id)
-        run_metrics = run.run.metrics
-        tries += 1
-
-    log.info("Found run metrics!")
-    return {metric.name: metric.number_value for metric in run_metrics}
+        run_metrics = getattr(get_run(run_id, host), "metrics", None)
+        if run_metrics:
+            log.info("Found run metrics!")
+            return {metric.name: metric.number_value for metric in run_metrics}
+        if tries < max_tries - 1:
+            time.sleep(next(intervals))
+    return {}
 
 
 def get_workflow_from_run(run):
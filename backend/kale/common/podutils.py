@@ -14,10 +14,13 @@
 
 """Suite of random helpers regarding pod manipulation."""
 
-from functools import cache
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, cached_property
 import logging
 import os
 import re
+import threading
+import time
 
 import tabulate
 
@@ -42,8 +45,17 @@ K8S_SIZE_UNITS = {
     "": 2**0,
 }
 
+# How long (in seconds) a snapshot of the current pod is reused for
+POD_CONTEXT_TTL = 30
+# Maximum number of PVCs that are read concurrently
+PVC_FETCH_MAX_WORKERS = 8
+
 log = logging.getLogger(__name__)
 
+_pod_context = None
+_pod_context_timestamp = 0.0
+_pod_context_lock = threading.Lock()
+
 
 def parse_k8s_size(size):
     """Parse a string with K8s size and return its integer equivalent."""
@@ -81,6 +93,10 @@ def get_container_name():
     on the NB_PREFIX env variable. If this is not the case, we need to
     apply some heuristics to try determining the container name.
     """
+    return _find_container_name()
+
+
+def _find_container_name(pod=None):
     log.info("Getting the current container name...")
     nb_prefix = os.getenv("NB_PREFIX")
     if nb_prefix:
@@ -98,7 +114,8 @@ def get_container_name():
         )
 
     # get the pod object and inspect the containers in the spec
-    pod = get_pod(get_pod_name(), get_namespace())
+    if pod is None:
+        pod = get_pod(get_pod_name(), get_namespace())
     container_names = [c.name for c in pod.spec.containers]
     if len(container_names) == 1:
         log.info(f"Found one container in the Pod: '{container_names[0]}'")
@@ -120,7 +137,7 @@ def get_container_name():
             "Too many container candidates.Cannot infer the"
             f" name of the current container from: {candidates} "
         )
-    if len(candidates) > 0:
+    if not candidates:
         raise RuntimeError(
             "No container names left. Could not infer the name of the running container."
         )
@@ -128,6 +145,64 @@ def get_container_name():
     return candidates[0]
 
 
+class PodContext:
+    """A snapshot of the current pod, as returned by `get_pod_context`.
+
+    Attributes:
+        pod: The V1Pod object of the current pod
+        namespace: The namespace of the current pod
+        container_name: The name of the current container
+        volumes: The PVCs mounted by the current container, as a list of
+            (mount_path, volume, size) tuples. These are fetched on first
+            access, so that a failure to read the PVCs does not prevent
+            getting information about the pod.
+    """
+
+    def __init__(self, pod, namespace: str, container_name: str):
+        self.pod = pod
+        self.namespace = namespace
+        self.container_name = container_name
+
+    @cached_property
+    def volumes(self):
+        return _list_volumes(
+            k8sutils.get_v1_client(), self.namespace, self.pod, self.container_name
+        )
+
+
+def get_pod_context(refresh: bool = False) -> PodContext:
+    """Get a snapshot of the current pod.
+
+    The pod is read once and the snapshot is reused for POD_CONTEXT_TTL
+    seconds, so that consecutive operations (e.g. getting the base image and
+    listing the volumes while validating a notebook) do not read it again.
+
+    Args:
+        refresh: Read the pod again, even if the snapshot has not expired
+
+    Raises:
+        ConfigException when initializing the client
+        FileNotFoundError when attempting to find the namespace
+        ApiException when reading the pod
+    """
+    global _pod_context, _pod_context_timestamp
+    with _pod_context_lock:
+        expired = time.monotonic() - _pod_context_timestamp > POD_CONTEXT_TTL
+        if _pod_context is None or expired or refresh:
+            namespace = get_namespace()
+            pod = get_pod(get_pod_name(), namespace)
+            _pod_context = PodContext(pod, namespace, _find_container_name(pod))
+            _pod_context_timestamp = time.monotonic()
+        return _pod_context
+
+
+def clear_pod_context():
+    """Drop the snapshot of the current pod."""
+    global _pod_context
+    with _pod_context_lock:
+        _pod_context = None
+
+
 def _get_pod_container(pod, container_name):
     container = list(filter(lambda c: c.name == container_name, pod.spec.containers))
     assert len(container) <= 1
@@ -166,22 +241,22 @@ def _get_mount_path(container, volume):
     raise RuntimeError(f"Could not find volume {volume.name} in container {container.name}")
 
 
-def _list_volumes(client, namespace, pod_name, container_name):
-    pod = client.read_namespaced_pod(pod_name, namespace)
+def _list_volumes(client, namespace, pod, container_name):
     container = _get_pod_container(pod, container_name)
+    pvc_volumes = [v for v in pod.spec.volumes if v.persistent_volume_claim]
+    if not pvc_volumes:
+        return []
 
-    volumes = []
-    for volume in pod.spec.volumes:
-        pvc_spec = volume.persistent_volume_claim
-        if not pvc_spec:
-            continue
-
-        pvc = client.read_namespaced_persistent_volume_claim(pvc_spec.claim_name, namespace)
+    def _get_volume(volume):
+        claim_name = volume.persistent_volume_claim.claim_name
+        pvc = client.read_namespaced_persistent_volume_claim(claim_name, namespace)
         mount_path = _get_mount_path(container, volume)
         volume_size = parse_k8s_size(pvc.spec.resources.requests["storage"])
-        volumes.append((mount_path, volume, volume_size))
+        return mount_path, volume, volume_size
 
-    return volumes
+    workers = min(PVC_FETCH_MAX_WORKERS, len(pvc_volumes))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_get_volume, pvc_volumes))
 
 
 def get_volume_containing_path(path):
@@ -207,11 +282,7 @@ def get_volume_containing_path(path):
 
 def list_volumes():
     """List the currently mounted volumes."""
-    client = k8sutils.get_v1_client()
-    namespace = get_namespace()
-    pod_name = get_pod_name()
-    container_name = get_container_name()
-    return _list_volumes(client, namespace, pod_name, container_name)
+    return get_pod_context().volumes
 
 
 def get_docker_base_image():
@@ -236,9 +307,8 @@ def get_docker_base_image():
         ApiException when getting the container name or reading the pod
     """
     log.info("Getting the base image of container...")
-    client = k8sutils.get_v1_client()
-    pod = client.read_namespaced_pod(get_pod_name(), get_namespace())
-    container_name = get_container_name()
+    context = get_pod_context()
+    pod, container_name = context.pod, context.container_name
 
     image = None
     try:
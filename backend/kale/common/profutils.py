@@ -0,0 +1,82 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Suite of helpers to measure where time goes in the compilation phases.
+
+Code is instrumented with the `phase` context manager, which is a no-op
+until profiling is enabled with `enable_profiling`. Phases can be nested and
+are reported in the order in which they were first entered.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+_enabled = False
+_timings: dict[tuple[str, ...], float] = {}
+_local = threading.local()
+
+
+def enable_profiling(enabled: bool = True):
+    """Enable (or disable) profiling and reset the collected timings."""
+    global _enabled
+    _enabled = enabled
+    _timings.clear()
+
+
+def is_profiling_enabled() -> bool:
+    """Return whether profiling is enabled."""
+    return _enabled
+
+
+@contextmanager
+def phase(name: str):
+    """Measure the wall-clock time spent in a phase.
+
+    Time spent in the same phase multiple times (e.g. once per step) is
+    accumulated.
+    """
+    if not _enabled:
+        yield
+        return
+    stack = getattr(_local, "stack", ())
+    key = stack + (name,)
+    _local.stack = key
+    _timings.setdefault(key, 0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings[key] += time.perf_counter() - start
+        _local.stack = stack
+
+
+def get_timings() -> dict[str, float]:
+    """Get the collected timings, in seconds, keyed by '/'-separated phase."""
+    return {"/".join(key): value for key, value in _timings.items()}
+
+
+def format_report() -> str:
+    """Format the collected timings as a human readable table."""
+    if not _timings:
+        return "No profiling data collected."
+    width = max(2 * (len(key) - 1) + len(key[-1]) for key in _timings)
+    total = sum(value for key, value in _timings.items() if len(key) == 1)
+    lines = [f"{'Phase':<{width}}  {'Time (s)':>9}  {'%':>6}"]
+    for key, value in _timings.items():
+        name = "  " * (len(key) - 1) + key[-1]
+        share = 100 * value / total if total else 0
+        lines.append(f"{name:<{width}}  {value:>9.3f}  {share:>5.1f}%")
+    lines.append(f"{'Total':<{width}}  {total:>9.3f}")
+    return "\n".join(lines)
@@ -12,11 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import json
 import logging
 import os
+import re
 import shutil
+import tempfile
+import threading
 import time
 from typing import Any
 
@@ -24,6 +31,7 @@ import kubernetes
 from kubernetes.client.rest import ApiException
 import pkg_resources
 import requests
+from requests.adapters import HTTPAdapter
 import yaml
 
 from kale import NotebookProcessor, marshal
@@ -31,6 +39,10 @@ from kale.common import astutils, flakeutils, jputils, k8sutils, podutils, utils
 
 log = logging.getLogger(__name__)
 
+# notebook path -> (mtime, analysis), see `_analyze_notebook`
+_notebook_analysis_cache: dict[str, tuple[int, tuple]] = {}
+_notebook_analysis_lock = threading.Lock()
+
 
 PREDICTORS = [
     "onnxcustom",
@@ -98,6 +110,119 @@ TRANSFORMER_ASSETS_DIR = os.path.join(PVC_ROOT, ".kale.kfserving-transformer.dir
 TRANSFORMER_FN_ASSET_NAME = "transformer_function"
 PREDICTOR_MODEL_DIR = os.path.join(PVC_ROOT, ".kale.kfserving.model.dir")
 TRANSFORMER_SRC_NOTEBOOK_NAME = "source_notebook.ipynb"
+TRANSFORMER_CONFIG_NAME = "transformer_config.json"
+# Attribute set on preprocessing functions that transform a whole batch
+TRANSFORMER_BATCH_ATTR = "_kale_accepts_batch"
+MICRO_BATCH_MAX_SIZE = 64
+# Maximum number of assets the transformer loads concurrently
+TRANSFORMER_ASSETS_MAX_WORKERS = 8
+INGRESS_GATEWAY_URL = "http://cluster-local-gateway.istio-system"
+# Maximum number of connections kept open to the gateway and of concurrent
+# requests sent by `KFServer.predict_batch`
+KFSERVER_POOL_MAXSIZE = 8
+
+
+def accepts_batch(fn: Callable) -> Callable:
+    """Declare that a preprocessing function transforms a whole batch.
+
+    By default, the transformer calls the preprocessing function once per
+    instance of a request. A function decorated with `accepts_batch` is
+    instead called once with the list of all the instances and must return
+    a list with the same number of processed instances. This allows using
+    vectorized transformations (e.g. with numpy or pandas).
+    """
+    setattr(fn, TRANSFORMER_BATCH_ATTR, True)
+    return fn
+
+
+def run_preprocessing_fn(fn: Callable, instances: list, batch: bool = False) -> list:
+    """Run a preprocessing function on the instances of a request.
+
+    Args:
+        fn: The preprocessing function
+        instances: The instances to be preprocessed
+        batch: Whether `fn` transforms the whole list of instances at once.
+            See `accepts_batch`.
+
+    Returns: The list of the preprocessed instances
+    """
+    if not batch:
+        return [fn(instance) for instance in instances]
+    res = list(fn(instances))
+    if len(res) != len(instances):
+        raise ValueError(
+            f"The preprocessing function returned {len(res)} results"
+            f" for a batch of {len(instances)} instances"
+        )
+    return res
+
+
+class MicroBatcher:
+    """Merge the instances of concurrent requests into a single batch.
+
+    Requests submitted within `window` seconds from the first pending one are
+    processed together, with a single call to `fn`, as soon as the window
+    expires or `max_batch_size` instances are pending. `fn` runs in a worker
+    thread, so that the event loop keeps accepting requests in the meantime.
+
+    Args:
+        fn: A function that receives a list of instances and returns the list
+            of their results
+        window: Maximum number of seconds a request waits for other requests
+        max_batch_size: Number of pending instances that triggers a batch
+    """
+
+    def __init__(self, fn: Callable, window: float, max_batch_size: int = MICRO_BATCH_MAX_SIZE):
+        self.fn = fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._pending_size = 0
+        self._timer = None
+        # the event loop only keeps weak references to tasks
+        self._tasks = set()
+
+    async def submit(self, instances: list) -> list:
+        """Process the instances of a request along with concurrent ones."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((instances, future))
+        self._pending_size += len(instances)
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_size = self._pending, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        instances = [instance for request, _ in batch for instance in request]
+        try:
+            results = await asyncio.to_thread(self.fn, instances)
+            if len(results) != len(instances):
+                raise ValueError(
+                    f"The preprocessing function returned {len(results)} results"
+                    f" for a batch of {len(instances)} instances"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for request, future in batch:
+            if not future.done():
+                future.set_result(results[offset : offset + len(request)])
+            offset += len(request)
 
 
 class KFServer:
@@ -110,6 +235,8 @@ class KFServer:
     def __init__(self, name: str, spec: str):
         self.name = name
         self.spec = spec
+        self._host = None
+        self._session = None
 
     def __repr__(self):
         """Show an interactive text in notebooks."""
@@ -118,7 +245,7 @@ class KFServer:
 
             html = (
                 f"InferenceService <pre>{self.name}</pre> serving requests at host"
-                f" <pre>{get_inference_service_host(self.name)}</pre><br>"
+                f" <pre>{self.host}</pre><br>"
                 f'View model <a href="/models/details/{podutils.get_namespace()}/{self.name}"'
                 ' target="_blank" >here</a>'
             )
@@ -127,6 +254,36 @@ class KFServer:
         else:
             return super().__repr__()
 
+    @property
+    def host(self) -> str:
+        """Get the InferenceService's host.
+
+        The host is resolved with a K8s API call the first time it is found
+        and reused afterwards.
+        """
+        if not self._host:
+            log.info("Getting InferenceService's host...")
+            self._host = get_inference_service_host(self.name)
+        return self._host
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the prediction endpoint."""
+        return f"{INGRESS_GATEWAY_URL}/v1/models/{self.name}:predict"
+
+    @property
+    def session(self) -> requests.Session:
+        """Get the HTTP session used to send prediction requests.
+
+        The session keeps a pool of connections to the gateway, so that
+        consecutive requests do not open a new connection each.
+        """
+        if self._session is None:
+            adapter = HTTPAdapter(pool_maxsize=KFSERVER_POOL_MAXSIZE)
+            self._session = requests.Session()
+            self._session.mount("http://", adapter)
+        return self._session
+
     def delete(self):
         """Delete the InferenceService CR."""
         namespace = podutils.get_namespace()
@@ -135,6 +292,9 @@ class KFServer:
         k8s_co_client.delete_namespaced_custom_object(
             CO_GROUP, CO_VERSION, namespace, CO_PLURAL, self.name
         )
+        if self._session is not None:
+            self._session.close()
+            self._session = None
         log.info("Successfully deleted InferenceService.")
 
     def predict(self, data: str, tensor=False):
@@ -146,15 +306,7 @@ class KFServer:
         # FIXME: Change this API to accept a dictionary and perform a
         #  json.dumps instead of relying on the user to do this.
         log.info("Sending a request to the InferenceService...")
-        log.info("Getting InferenceService's host...")
-        host = get_inference_service_host(self.name)
-        headers = {"content-type": "application/json", "Host": host}
-        log.info("Sending request to InferenceService...")
-        response = requests.post(
-            f"http://cluster-local-gateway.istio-system/v1/models/{self.name}:predict",
-            data=data,
-            headers=headers,
-        )
+        response = self._send(data)
         if response.status_code == 200:
             log.info("Response: %s", utils.shorten_long_string(response.text))
             if tensor:
@@ -165,18 +317,276 @@ class KFServer:
             log.error("The request failed with status code %s", response.status_code)
             return response
 
+    def _send(self, data: str) -> requests.Response:
+        headers = {"content-type": "application/json", "Host": self.host}
+        return self.session.post(self.url, data=data, headers=headers)
+
+    def predict_batch(
+        self, data: list[str], tensor=False, max_workers: int = KFSERVER_POOL_MAXSIZE
+    ) -> list:
+        """Hit the InferenceService endpoint with many concurrent requests.
+
+        Args:
+            data: The bodies of the requests
+            tensor: when set to True, return the results loaded in tensor
+                objects, based on the framework being used.
+            max_workers: The maximum number of requests sent concurrently
+
+        Returns: The result of every request, in the same order as `data`.
+            See `predict`.
+        """
+        if not data:
+            return []
+        # resolve the host once, before sending the requests
+        log.info("Sending %d requests to InferenceService '%s'...", len(data), self.host)
+        workers = max(1, min(max_workers, len(data)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda d: self.predict(d, tensor=tensor), data))
+
     def _to_tensor(self, data):
         log.warning("Kale does not yet support converting the predicted response to a tensor.")
         return data
 
 
+def _predict_sklearn(model, instances: list):
+    return model.predict(instances)
+
+
+def _predict_xgboost(model, instances: list):
+    import xgboost
+
+    return model.predict(xgboost.DMatrix(instances))
+
+
+def _predict_tensorflow(model, instances: list):
+    import numpy as np
+
+    return model.predict(np.array(instances))
+
+
+# predictor type -> function that runs a loaded model on a list of instances
+LOCAL_PREDICTORS = {
+    "sklearn": _predict_sklearn,
+    "xgboost": _predict_xgboost,
+    "tensorflow": _predict_tensorflow,
+}
+
+
+def _to_json_compatible(predictions):
+    # numpy arrays, tensors, ...
+    if hasattr(predictions, "tolist"):
+        return predictions.tolist()
+    return list(predictions)
+
+
+class _LocalPredictHandler(BaseHTTPRequestHandler):
+    """Serve the KFServing v1 protocol for a `LocalKFServer`."""
+
+    path_re = re.compile(r"^/v1/models/(?P<name>[^/:]+)(?P<verb>:predict)?$")
+
+    def _reply(self, status: HTTPStatus, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _match(self, verb: str = None):
+        match = self.path_re.match(self.path)
+        kfserver = self.server.kfserver
+        if not match or match["name"] != kfserver.name or match["verb"] != verb:
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Model not found: {self.path}"})
+            return None
+        return kfserver
+
+    def do_GET(self):  # noqa: N802
+        """Return the status of the model."""
+        kfserver = self._match()
+        if kfserver:
+            self._reply(HTTPStatus.OK, {"name": kfserver.name, "ready": True})
+
+    def do_POST(self):  # noqa: N802
+        """Run a prediction."""
+        kfserver = self._match(":predict")
+        if not kfserver:
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            instances = body["instances"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": "Expected a JSON body with instances"})
+            return
+        try:
+            self._reply(HTTPStatus.OK, {"predictions": kfserver.handle(instances)})
+        except Exception as e:
+            log.exception("Prediction failed")
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        """Log the requests at debug level."""
+        log.debug("%s - %s", self.address_string(), format % args)
+
+
+class LocalKFServer(KFServer):
+    """A local stand-in for an InferenceService.
+
+    The model is served in-process by an HTTP server that mirrors the
+    KFServing prediction endpoint (`/v1/models/<name>:predict`). The
+    preprocessing function, if any, runs before the model, like the
+    KFServing transformer would, so that the whole serving path can be
+    tested and measured without a cluster.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        predictor: str,
+        preprocessing_fn: Callable = None,
+        address: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        super().__init__(name=name, spec="")
+        if predictor not in LOCAL_PREDICTORS:
+            raise ValueError(
+                f"Predictor '{predictor}' cannot be served locally."
+                f" Choose one of {list(LOCAL_PREDICTORS)}"
+            )
+        self.model = model
+        self.predictor = predictor
+        self.preprocessing_fn = preprocessing_fn
+        self._predict_fn = LOCAL_PREDICTORS[predictor]
+        self._server = ThreadingHTTPServer((address, port), _LocalPredictHandler)
+        self._server.daemon_threads = True
+        self._server.kfserver = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        log.info("Serving model '%s' locally at %s", name, self.url)
+
+    def __repr__(self):
+        """Show the local endpoint."""
+        return f"LocalKFServer(name={self.name!r}, url={self.url!r})"
+
+    @property
+    def host(self) -> str:
+        """Get the address the local server listens at."""
+        address, port = self._server.server_address[:2]
+        return f"{address}:{port}"
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the prediction endpoint."""
+        return f"http://{self.host}/v1/models/{self.name}:predict"
+
+    def handle(self, instances: list) -> list:
+        """Run the preprocessing function and the model on some instances."""
+        if self.preprocessing_fn:
+            batch = getattr(self.preprocessing_fn, TRANSFORMER_BATCH_ATTR, False)
+            instances = run_preprocessing_fn(self.preprocessing_fn, instances, batch)
+        return _to_json_compatible(self._predict_fn(self.model, instances))
+
+    def delete(self):
+        """Stop the local server."""
+        log.info("Stopping local server of model '%s'...", self.name)
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+def _serve_local(model: Any, name: str, predictor: str, preprocessing_fn: Callable = None):
+    # Round-trip the model through its marshal backend, like the predictor
+    # server loads it from the PVC
+    data_dir = marshal.get_data_dir()
+    with tempfile.TemporaryDirectory(prefix="kale-local-serving-") as model_dir:
+        marshal.set_data_dir(model_dir)
+        try:
+            marshal.save(model, "model")
+            loaded_model = marshal.load("model")
+        finally:
+            marshal.set_data_dir(data_dir)
+    return LocalKFServer(name, loaded_model, predictor, preprocessing_fn=preprocessing_fn)
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    # nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def load_test(
+    kfserver: KFServer,
+    data: str | list[str],
+    num_requests: int = 100,
+    concurrency: int = KFSERVER_POOL_MAXSIZE,
+) -> dict:
+    """Measure the latency and throughput of a served model.
+
+    Works both with deployed InferenceServices and with models served
+    locally (see `serve(local=True)`).
+
+    Args:
+        kfserver: The server to send the requests to
+        data: The body of the requests, or a list of bodies that are sent
+            in a round-robin fashion
+        num_requests: The total number of requests
+        concurrency: The number of requests sent concurrently
+
+    Returns (dict): The number of requests and errors, the throughput (in
+        requests per second) and the p50, p95 and p99 latencies (in ms)
+    """
+    if isinstance(data, str):
+        data = [data]
+    # resolve the host once, before sending the requests
+    log.info("Load testing '%s' at %s...", kfserver.name, kfserver.host)
+
+    def _send(index: int):
+        start = time.perf_counter()
+        response = kfserver._send(data[index % len(data)])
+        return time.perf_counter() - start, response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, num_requests))) as executor:
+        results = list(executor.map(_send, range(num_requests)))
+    duration = time.perf_counter() - start
+
+    latencies = sorted(1000 * latency for latency, _ in results)
+    report = {
+        "requests": num_requests,
+        "errors": sum(not ok for _, ok in results),
+        "duration_s": duration,
+        "throughput_rps": num_requests / duration if duration else 0.0,
+    }
+    for percent in (50, 95, 99):
+        report[f"p{percent}_ms"] = _percentile(latencies, percent) if latencies else 0.0
+    log.info(
+        "%d requests (%d errors) in %.2fs: %.1f req/s, p50 %.1fms, p95 %.1fms, p99 %.1fms",
+        report["requests"],
+        report["errors"],
+        duration,
+        report["throughput_rps"],
+        report["p50_ms"],
+        report["p95_ms"],
+        report["p99_ms"],
+    )
+    return report
+
+
 def serve(
-    model: Any,
+    model: Any = None,
     name: str = None,
     wait: bool = True,
     predictor: str = None,
     preprocessing_fn: Callable = None,
     preprocessing_assets: dict = None,
+    preprocessing_batch_window: float = None,
+    preprocessing_max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+    local: bool = False,
+    timeout: float = None,
+    model_path: str = None,
 ) -> KFServer:
     """Main API used to serve models from a notebook or a pipeline step.
 
@@ -208,19 +618,46 @@ def serve(
         preprocessing_assets (optional): A dictionary with object required by
             the preprocessing function. This is needed in case the
             preprocessing function references global objects.
+        preprocessing_batch_window (optional): Merge the instances of the
+            requests that reach the transformer within this many seconds
+            and preprocess them together. Most useful with functions
+            decorated with `accepts_batch`. Requires a KFServing version
+            that supports asynchronous `preprocess` methods.
+        preprocessing_max_batch_size (optional): Preprocess the merged
+            requests as soon as they count this many instances
+        local (optional): Serve the model from a local HTTP server instead
+            of deploying an InferenceService. The preprocessing function
+            runs in-process. Useful to test and load test (see `load_test`)
+            a model before deploying it.
+        timeout (optional): Maximum number of seconds to wait for the
+            InferenceService to become ready. Wait forever if not provided.
+        model_path (optional): Path to a model that is already marshalled,
+            e.g. the output of a previous pipeline step (see
+            `marshal.get_path`). The model is linked into the predictor's
+            directory instead of being loaded and saved again. Use it
+            instead of `model`.
 
     Returns: A KFServer instance
     """
-    log.info("Starting serve procedure for model '%s'", model)
+    if (model is None) == (model_path is None):
+        raise ValueError("Please provide either a model object or a `model_path`")
+    log.info("Starting serve procedure for model '%s'", model_path or model)
     if not name:
-        name = f"{podutils.get_pod_name()}-{utils.random_string(5)}"
+        prefix = "model" if local else podutils.get_pod_name()
+        name = f"{prefix}-{utils.random_string(5)}"
 
     # Validate and process transformer
-    if preprocessing_fn:
-        _prepare_transformer_assets(preprocessing_fn, preprocessing_assets)
+    if preprocessing_fn and not local:
+        _prepare_transformer_assets(
+            preprocessing_fn,
+            preprocessing_assets,
+            batch_window=preprocessing_batch_window,
+            max_batch_size=preprocessing_max_batch_size,
+        )
 
     # Detect predictor type
-    predictor_type = marshal.get_backend(model).predictor_type
+    backend = marshal.get_backend_by_path(model_path) if model_path else marshal.get_backend(model)
+    predictor_type = backend.predictor_type
     if predictor and predictor != predictor_type:
         raise RuntimeError(
             "Trying to create an InferenceService with"
@@ -233,18 +670,27 @@ def serve(
             " backend.\n\nPlease help us improve Kale by opening a new"
             " issue at:\n"
             "https://github.com/kubeflow-kale/kale/issues",
-            marshal.get_backend(model).display_name,
+            backend.display_name,
         )
         utils.graceful_exit(-1)
     predictor = predictor_type  # in case `predictor` is None
 
+    if local:
+        if model_path:
+            model = backend.load(model_path)
+            return LocalKFServer(name, model, predictor, preprocessing_fn=preprocessing_fn)
+        return _serve_local(model, name, predictor, preprocessing_fn)
+
     volume = podutils.get_volume_containing_path(PVC_ROOT)
     volume_name = volume[1].persistent_volume_claim.claim_name
     log.info("Model is contained in volume '%s'", volume_name)
 
     # Dump the model
-    marshal.set_data_dir(PREDICTOR_MODEL_DIR)
-    model_filepath = marshal.save(model, "model")
+    if model_path:
+        model_filepath = _link_marshalled_model(model_path)
+    else:
+        marshal.set_data_dir(PREDICTOR_MODEL_DIR)
+        model_filepath = marshal.save(model, "model")
     log.info("Model saved successfully at '%s'", model_filepath)
 
     new_pvc_name = volume_name
@@ -263,17 +709,81 @@ def serve(
     )
 
     if wait:
-        monitor_inference_service(kfserver.name)
+        monitor_inference_service(kfserver.name, timeout=timeout)
     return kfserver
 
 
-def _prepare_transformer_assets(fn: Callable, assets: dict = None):
-    notebook_path = jputils.get_notebook_path()
+def _link_marshalled_model(model_path: str) -> str:
+    """Link a marshalled model into the predictor's model directory.
+
+    The predictor mounts the PVC of the model directory, so the model needs
+    to be in the same volume: hard link its file(s) when possible, falling
+    back to copying them when the model lives in a different volume.
+
+    Returns (str): The path of the model in the predictor's directory
+    """
+    os.makedirs(PREDICTOR_MODEL_DIR, exist_ok=True)
+    # replace a previous model, possibly saved with a different backend
+    for entry in os.listdir(PREDICTOR_MODEL_DIR):
+        if os.path.splitext(entry)[0] == "model":
+            utils.rm_r(os.path.join(PREDICTOR_MODEL_DIR, entry))
+    model_filepath = os.path.join(
+        PREDICTOR_MODEL_DIR, "model" + os.path.splitext(model_path.rstrip("/"))[1]
+    )
+
+    def _link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    log.info("Linking marshalled model '%s' to '%s'", model_path, model_filepath)
+    if os.path.isdir(model_path):
+        shutil.copytree(model_path, model_filepath, copy_function=_link_or_copy)
+    else:
+        _link_or_copy(model_path, model_filepath)
+    return model_filepath
+
+
+def _analyze_notebook(notebook_path: str) -> tuple[str, set[str] | None, set[str]]:
+    """Get the imports and functions of a notebook and analyze their names.
+
+    The analysis is cached until the notebook is modified, so that serving
+    models repeatedly from the same notebook does not parse it every time.
+
+    Returns (tuple): The imports and functions code, the names it defines
+        (None if they cannot be determined) and the names it misses
+    """
+    mtime = os.stat(notebook_path).st_mtime_ns
+    with _notebook_analysis_lock:
+        cached = _notebook_analysis_cache.get(notebook_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
     processor = NotebookProcessor(nb_path=notebook_path, skip_validation=True)
+    init_code = processor.get_imports_and_functions()
+    defined_names = astutils.get_global_names(init_code)
+    missing_names = set() if defined_names is None else flakeutils.pyflakes_report(init_code)
+    analysis = (init_code, defined_names, missing_names)
+    with _notebook_analysis_lock:
+        _notebook_analysis_cache[notebook_path] = (mtime, analysis)
+    return analysis
+
+
+def _prepare_transformer_assets(
+    fn: Callable,
+    assets: dict = None,
+    batch_window: float = None,
+    max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+):
+    notebook_path = jputils.get_notebook_path()
+    init_code, defined_names, init_missing_names = _analyze_notebook(notebook_path)
     fn_source = astutils.get_function_source(fn, strip_signature=False)
-    missing_names = flakeutils.pyflakes_report(
-        processor.get_imports_and_functions() + "\n" + fn_source
-    )
+    if defined_names is None:
+        missing_names = flakeutils.pyflakes_report(init_code + "\n" + fn_source)
+    else:
+        # just analyze the function, the notebook's analysis is cached
+        fn_missing_names = flakeutils.pyflakes_report(fn_source) - defined_names
+        missing_names = init_missing_names | fn_missing_names
     if not assets:
         assets = {}
     if not isinstance(assets, dict):
@@ -297,6 +807,19 @@ def _prepare_transformer_assets(fn: Callable, assets: dict = None):
         marshal.save(asset_value, asset_name)
     # save notebook as well
     shutil.copy(notebook_path, os.path.join(TRANSFORMER_ASSETS_DIR, TRANSFORMER_SRC_NOTEBOOK_NAME))
+    # The transformer recreates the function, losing its attributes. Also,
+    # save the initialization code and the list of assets, so that the
+    # transformer does not need to parse the notebook and list the assets
+    # directory at startup.
+    config = {
+        "batch": getattr(fn, TRANSFORMER_BATCH_ATTR, False),
+        "batch_window": batch_window,
+        "max_batch_size": max_batch_size,
+        "init_code": init_code,
+        "assets": list(assets),
+    }
+    with open(os.path.join(TRANSFORMER_ASSETS_DIR, TRANSFORMER_CONFIG_NAME), "w") as f:
+        json.dump(config, f)
 
 
 def create_inference_service(
@@ -431,7 +954,27 @@ def _add_owner_references(infs_name: str, pvc_name: str):
     )
 
 
-def monitor_inference_service(name: str):
+def _get_ready_host(inference_service: dict) -> str | None:
+    """Get the predictor's host of an InferenceService, None if not ready."""
+    status = inference_service.get("status")
+    if not status:
+        return None
+    if not any(
+        condition.get("type") == "Ready" and condition.get("status") == "True"
+        for condition in status.get("conditions", [])
+    ):
+        return None
+    try:
+        if status.get("default"):  # v1alpha3
+            return status["default"]["predictor"]["host"]
+        elif status.get("components"):  # v1beta1
+            return status["components"]["predictor"]["url"]
+    except KeyError:
+        pass
+    return None
+
+
+def monitor_inference_service(name: str, timeout: float = None) -> str:
     """Waits for an InferenceService to become ready.
 
     An InferenceService is considered ready when two conditions are met:
@@ -440,38 +983,62 @@ def monitor_inference_service(name: str):
          type ``Ready`` with a ``True`` status.
       2. The CR defines a valid host/url for the (default) predictor.
 
+    The CR is watched, so that its changes are received as soon as they
+    happen instead of polling the API server.
+
     Args:
         name (str): Name of the KFServing InferenceService
+        timeout (optional): Maximum number of seconds to wait for. Wait
+            forever if not provided.
+
+    Returns:
+        str: The host/url of the (default) predictor
+
+    Raises:
+        TimeoutError: The InferenceService did not become ready in time
+        RuntimeError: The InferenceService was deleted
+        ApiException: The InferenceService could not be watched
     """
-    host = None
-
-    def _is_ready(inference_service):
-        if not inference_service.get("status"):
-            return False
-        for condition in inference_service["status"].get("conditions", []):
-            if condition.get("type") == "Ready" and condition.get("status") == "True":
-                return True
-        return False
-
-    while host is None:
-        log.info("Waiting for InferenceService '%s' to become ready...", name)
-        try:
-            inf = get_inference_service(name)
-        except ApiException as e:
-            log.error("Failed to get InferenceService. ApiException: %s", e)
-            return
+    deadline = None if timeout is None else time.monotonic() + timeout
+    co_client = k8sutils.get_co_client()
+    namespace = podutils.get_namespace()
+    log.info("Waiting for InferenceService '%s' to become ready...", name)
+    while deadline is None or time.monotonic() < deadline:
+        # The API server closes watches after a while, so restart it until
+        # the deadline expires
+        watch_timeout = None if deadline is None else max(1, int(deadline - time.monotonic()))
+        watcher = kubernetes.watch.Watch()
+        stream = watcher.stream(
+            co_client.list_namespaced_custom_object,
+            CO_GROUP,
+            CO_VERSION,
+            namespace,
+            CO_PLURAL,
+            field_selector=f"metadata.name={name}",
+            timeout_seconds=watch_timeout,
+        )
+        for event in stream:
+            if event["type"] == "DELETED":
+                watcher.stop()
+                raise RuntimeError(f"InferenceService '{name}' was deleted")
+            host = _get_ready_host(event["object"])
+            if host:
+                watcher.stop()
+                log.info("InferenceService '%s' is ready.", name)
+                return host
+    raise TimeoutError(f"InferenceService '{name}' did not become ready within {timeout}s")
+
+
+async def monitor_inference_service_async(name: str, timeout: float = None) -> str:
+    """Wait for an InferenceService to become ready, without blocking.
 
-        if _is_ready(inf):
-            try:
-                if inf["status"].get("default"):  # v1alpha3
-                    host = inf["status"]["default"]["predictor"]["host"]
-                elif inf["status"].get("components"):  # v1beta1
-                    host = inf["status"]["components"]["predictor"]["url"]
-            except KeyError:
-                pass
-        time.sleep(3)
-
-    log.info("InferenceService '%s' is ready.", name)
+    Use it to wait for several InferenceServices concurrently, e.g.:
+
+        await asyncio.gather(*(monitor_inference_service_async(n) for n in names))
+
+    See `monitor_inference_service`.
+    """
+    return await asyncio.to_thread(monitor_inference_service, name, timeout)
 
 
 def get_inference_service(name: str):
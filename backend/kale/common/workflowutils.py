@@ -14,6 +14,8 @@
 
 """Suite of helpers regarding workflow manipulation."""
 
+import kubernetes
+
 from kale.common import k8sutils
 
 ARGO_WORKFLOW_LABEL_KEY = "workflows.argoproj.io/workflow"
@@ -75,3 +77,36 @@ def annotate_workflow(name, namespace, annotations):
     k8sutils.annotate_object(
         ARGO_API_GROUP, ARGO_API_VERSION, ARGO_WORKFLOWS_PLURAL, name, namespace, annotations
     )
+
+
+def watch_workflow_completion(namespace, label_selector, timeout=None):
+    """Watch the workflows matching a label selector until one completes.
+
+    Args:
+        namespace: Namespace of the workflows
+        label_selector: K8s label selector, e.g. `pipeline/runid=<id>`
+        timeout: Maximum number of seconds to watch for
+
+    Returns:
+        The final phase of the workflow, None if it did not complete in time
+    """
+    co_client = k8sutils.get_co_client()
+    watcher = kubernetes.watch.Watch()
+    stream = watcher.stream(
+        co_client.list_namespaced_custom_object,
+        ARGO_API_GROUP,
+        ARGO_API_VERSION,
+        namespace,
+        ARGO_WORKFLOWS_PLURAL,
+        label_selector=label_selector,
+        timeout_seconds=timeout,
+    )
+    # Workflows that already exist are streamed as ADDED events, so this
+    # returns right away if the workflow has already completed.
+    for event in stream:
+        workflow = event["object"]
+        labels = workflow.get("metadata", {}).get("labels") or {}
+        if labels.get(ARGO_COMPLETED_LABEL_KEY) == "true":
+            watcher.stop()
+            return labels.get(ARGO_PHASE_LABEL_KEY) or workflow.get("status", {}).get("phase")
+    return None
@@ -13,8 +13,15 @@
 # limitations under the License.
 
 import argparse
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import importlib
 import logging
+import multiprocessing
 import os
+import pickle
+from pickle import PicklingError
 import re
 from typing import NamedTuple
 
@@ -22,7 +29,7 @@ import autopep8
 from jinja2 import Environment, FileSystemLoader, PackageLoader
 
 from kale import __version__ as KALE_VERSION
-from kale.common import graphutils, kfputils, utils
+from kale.common import graphutils, kfputils, profutils, utils
 from kale.pipeline import Pipeline, PipelineParam, Step
 
 log = logging.getLogger(__name__)
@@ -32,6 +39,17 @@ NB_FN_TEMPLATE = "nb_function_template.jinja2"
 PIPELINE_TEMPLATE = "pipeline_template.jinja2"
 PIPELINE_ORIGIN = {"nb": NB_FN_TEMPLATE, "py": PY_FN_TEMPLATE}
 
+# Number of processes used to format the generated components. Code generation
+# is serial unless this is set to a value greater than 1.
+KALE_COMPILE_WORKERS_ENV = "KALE_COMPILE_WORKERS"
+# Below this number of steps, spawning a process pool costs more than it saves
+PARALLEL_COMPILE_MIN_STEPS = 8
+# Formatter applied to the generated code. See `get_formatter`.
+KALE_DSL_FORMATTER_ENV = "KALE_DSL_FORMATTER"
+DEFAULT_FORMATTER = "autopep8"
+# Stands in for the components while the pipeline code is being formatted
+_COMPONENTS_PLACEHOLDER = "__KALE_LIGHTWEIGHT_COMPONENTS__ = None"
+
 KFP_DSL_ARTIFACT_IMPORTS = [
     "Dataset",
     "Model",
@@ -42,6 +60,40 @@ KFP_DSL_ARTIFACT_IMPORTS = [
 ]
 
 
+def _no_format(code: str) -> str:
+    return code
+
+
+FORMATTERS = {"autopep8": autopep8.fix_code, "none": _no_format}
+
+
+def get_formatter(formatter: str | Callable[[str], str] = None) -> Callable[[str], str]:
+    """Get the function used to format the generated code.
+
+    The generated code is valid as is, formatting only makes it prettier.
+
+    Args:
+        formatter: Either a function that takes and returns a code string,
+            the name of a builtin formatter ('autopep8', 'none') or the
+            import path of a function, in the form 'package.module:function'.
+            Defaults to the KALE_DSL_FORMATTER env var, or 'autopep8'.
+
+    Returns: A function that takes and returns a code string
+    """
+    if callable(formatter):
+        return formatter
+    formatter = formatter or os.getenv(KALE_DSL_FORMATTER_ENV) or DEFAULT_FORMATTER
+    if formatter in FORMATTERS:
+        return FORMATTERS[formatter]
+    module_name, _, fn_name = formatter.partition(":")
+    if not module_name or not fn_name:
+        raise ValueError(
+            f"Invalid formatter '{formatter}'. Use one of {list(FORMATTERS)}"
+            " or the path to a function, in the form 'package.module:function'."
+        )
+    return getattr(importlib.import_module(module_name), fn_name)
+
+
 class Artifact(NamedTuple):
     """A Step artifact."""
 
@@ -61,12 +113,22 @@ class Compiler:
     (environment, configuration, etc...) for the script to be compiled.
     """
 
-    def __init__(self, pipeline: Pipeline, imports_and_functions: str):
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        imports_and_functions: str,
+        workers: int = None,
+        formatter: str | Callable[[str], str] = None,
+    ):
         self.pipeline = pipeline
         self.templating_env = None
         self.dsl_source = ""
         self.dsl_script_path = None
         self.imports_and_functions = imports_and_functions
+        if workers is None:
+            workers = int(os.getenv(KALE_COMPILE_WORKERS_ENV, 1))
+        self.workers = workers
+        self.formatter = get_formatter(formatter)
 
     @staticmethod
     def _get_args():
@@ -96,22 +158,56 @@ class Compiler:
                 " DSL script. Please run the `compile` function"
                 " first."
             )
-        self._run_compiled_code(self.dsl_script_path)
+        self._run_compiled_code()
 
     def generate_dsl(self):
         """Generate a Python KFP DSL executable starting from the pipeline.
 
         Returns (str): A Python executable script
         """
-        # List of lightweight components generated code
-        lightweight_components = [
-            self.generate_lightweight_component(step) for step in self.pipeline.steps
-        ]
+        steps = list(self.pipeline.steps)
+        # Rendering is cheap and needs the Step objects, which cannot be
+        # shipped to other processes (e.g. `step.source` may be a function),
+        # so only the formatting of the rendered code is parallelized.
+        with profutils.phase("render components"):
+            rendered = [self._render_lightweight_component(step) for step in steps]
+        workers = min(self.workers, len(rendered))
+        with profutils.phase("format components"):
+            if self.formatter is _no_format:
+                lightweight_components = rendered
+            elif workers > 1 and len(rendered) >= PARALLEL_COMPILE_MIN_STEPS:
+                lightweight_components = self._format_parallel(rendered, workers)
+            else:
+                lightweight_components = list(map(self.formatter, rendered))
         pipeline_code = self.generate_pipeline(lightweight_components)
         return pipeline_code
 
+    def _format_parallel(self, sources: list[str], workers: int) -> list[str]:
+        try:
+            # the formatter is shipped to the workers, which is not possible
+            # for e.g. lambdas and closures
+            pickle.dumps(self.formatter)
+        except (PicklingError, AttributeError, TypeError) as e:
+            log.warning("Formatting the components serially, formatter cannot be pickled: %s", e)
+            return list(map(self.formatter, sources))
+        log.debug("Formatting %d components using %d processes", len(sources), workers)
+        try:
+            # the compiler often runs in a multithreaded process (e.g. the
+            # Jupyter kernel serving the RPCs), where forking is not safe
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                # `map` yields the results in the order of the inputs
+                return list(executor.map(self.formatter, sources))
+        except (OSError, BrokenProcessPool, PicklingError) as e:
+            log.warning("Could not format the components in parallel: %s", e)
+            return list(map(self.formatter, sources))
+
     def generate_lightweight_component(self, step: Step):
         """Generate Python code using the function template."""
+        return self.formatter(self._render_lightweight_component(step))
+
+    def _render_lightweight_component(self, step: Step):
         step_source_raw = step.source
 
         def _encode_source(s):
@@ -201,7 +297,7 @@ class Compiler:
             kfp_dsl_artifact_imports=KFP_DSL_ARTIFACT_IMPORTS,
             **self.pipeline.config.to_dict(),
         )
-        return autopep8.fix_code(fn_code)
+        return fn_code
 
     def generate_pipeline(self, lightweight_components):
         """Generate Python code using the pipeline template."""
@@ -246,18 +342,24 @@ class Compiler:
             for step in self.pipeline.steps:
                 component_names[step.name] = step.name.replace("_", "-")
 
-        pipeline_code = template.render(
-            pipeline=self.pipeline,
-            lightweight_components=lightweight_components,
-            step_outputs=step_outputs,
-            step_inputs=step_inputs,
-            step_inputs_sources=step_inputs_sources,
-            pipeline_param_info=pipeline_param_info,
-            component_names=component_names,
-            **self.pipeline.config.to_dict(),
+        # The components are already formatted: format just the pipeline code
+        # around them, then put them in place.
+        with profutils.phase("render pipeline"):
+            pipeline_code = template.render(
+                pipeline=self.pipeline,
+                lightweight_components=[_COMPONENTS_PLACEHOLDER],
+                step_outputs=step_outputs,
+                step_inputs=step_inputs,
+                step_inputs_sources=step_inputs_sources,
+                pipeline_param_info=pipeline_param_info,
+                component_names=component_names,
+                **self.pipeline.config.to_dict(),
+            )
+        with profutils.phase("format pipeline"):
+            pipeline_code = self.formatter(pipeline_code)
+        return pipeline_code.replace(
+            _COMPONENTS_PLACEHOLDER + "\n", "\n" + "\n\n".join(lightweight_components), 1
         )
-        # fix code style using pep8 guidelines
-        return autopep8.fix_code(pipeline_code)
 
     def _get_package_list_from_imports(self):
         """Extracts unique package names from the tagged imports cell.
@@ -305,7 +407,7 @@ class Compiler:
             loader = FileSystemLoader(templates_path)
         else:
             loader = PackageLoader("kale", "templates")
-        template_env = Environment(loader=loader)
+        template_env = Environment(loader=loader, keep_trailing_newline=True)
         # add custom filters
         template_env.filters["add_suffix"] = lambda s, suffix: s + suffix
         template_env.filters["add_prefix"] = lambda s, prefix: prefix + s
@@ -328,9 +430,25 @@ class Compiler:
         self.dsl_script_path = output_path
         return output_path
 
-    def _run_compiled_code(self, script_path: str):
+    def compile_package(self) -> str:
+        """Compile the generated DSL code to a KFP package.
+
+        The pipeline function is built straight from the generated code held
+        in memory, compiling the Pipeline to DSL first if needed.
+
+        Returns path to the KFP package.
+        """
+        if not self.dsl_script_path:
+            self.compile()
+        filename = f"{self.pipeline.config.pipeline_name}.pipeline.yaml"
+        package_path = os.path.join(os.path.dirname(self.dsl_script_path), filename)
+        return kfputils.compile_pipeline_source(
+            self.dsl_source, package_path, filename=self.dsl_script_path
+        )
+
+    def _run_compiled_code(self):
         pipeline_name = self.pipeline.config.pipeline_name
-        pipeline_yaml_path = kfputils.compile_pipeline(script_path, pipeline_name)
+        pipeline_yaml_path = self.compile_package()
         pipeline_id, version_id = kfputils.upload_pipeline(pipeline_yaml_path, pipeline_name)
         kfputils.run_pipeline(
             experiment_name=self.pipeline.config.experiment_name,
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+import json
 import logging
 import os
 import types
@@ -32,13 +34,31 @@ class KaleTransformer(kfserving.KFModel):
         self.predictor_host = predictor_host
         self.assets = {}
         self.init_code = None
+        self.config = {}
         # load everything during bootstrap, so that when the user hits the
         # prediction endpoint the response delay is influenced just by
         # computation time.
         self._load_transformer_assets()
+        self.batcher = None
+        if self.config.get("batch_window"):
+            log.info("Merging requests received within %ss...", self.config["batch_window"])
+            self.batcher = serveutils.MicroBatcher(
+                self._transform,
+                self.config["batch_window"],
+                self.config.get("max_batch_size") or serveutils.MICRO_BATCH_MAX_SIZE,
+            )
+            # KFServing awaits `preprocess` when it is a coroutine
+            self.preprocess = self._preprocess_micro_batch
 
     def _load_transformer_assets(self):
         marshal.set_data_dir(serveutils.TRANSFORMER_ASSETS_DIR)
+        config_path = os.path.join(
+            serveutils.TRANSFORMER_ASSETS_DIR, serveutils.TRANSFORMER_CONFIG_NAME
+        )
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                self.config = json.load(f)
+        log.info(f"Transformer configuration: {self.config}")
         log.info("Loading transformer function...")
         _fn = marshal.load(serveutils.TRANSFORMER_FN_ASSET_NAME)
         # create a new function monkey patching the original function's
@@ -50,6 +70,29 @@ class KaleTransformer(kfserving.KFModel):
             _fn.__code__, globals(), _fn.__name__, _fn.__defaults__, _fn.__closure__
         )
 
+        self.init_code = self._get_init_code()
+        log.info(f"Initialization code:\n{self.init_code}")
+        log.info("Running initialization code...")
+        exec(self.init_code, globals())
+
+        # Unpickling the assets may need the imports and classes defined by
+        # the initialization code, so load them only once it has run
+        log.info("Loading transformer's assets...")
+        asset_names = self._list_asset_names()
+        workers = max(1, min(serveutils.TRANSFORMER_ASSETS_MAX_WORKERS, len(asset_names)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            self.assets = dict(
+                zip(asset_names, executor.map(marshal.load, asset_names), strict=True)
+            )
+        log.info(f"Assets successfully loaded: {self.assets.keys()}")
+        log.info("Initializing assets...")
+        for asset_name, asset_value in self.assets.items():
+            globals()[asset_name] = asset_value
+
+    def _get_init_code(self) -> str:
+        if "init_code" in self.config:
+            return self.config["init_code"]
+        # assets prepared by a previous version of Kale
         log.info("Processing source notebook for imports and functions...")
         processor = NotebookProcessor(
             nb_path=os.path.join(
@@ -57,26 +100,25 @@ class KaleTransformer(kfserving.KFModel):
             ),
             skip_validation=True,
         )
-        self.init_code = processor.get_imports_and_functions()
-        log.info(f"Initialization code:\n{self.init_code}")
-        log.info("Running initialization code...")
-        exec(self.init_code, globals())
+        return processor.get_imports_and_functions()
 
-        log.info("Loading transformer's assets...")
+    def _list_asset_names(self) -> list[str]:
+        if "assets" in self.config:
+            return self.config["assets"]
+        # assets prepared by a previous version of Kale
+        names = []
         for file in os.listdir(serveutils.TRANSFORMER_ASSETS_DIR):
             if file in [
                 serveutils.TRANSFORMER_SRC_NOTEBOOK_NAME,
-                serveutils.TRANSFORMER_FN_ASSET_NAME,
+                serveutils.TRANSFORMER_CONFIG_NAME,
             ]:
                 continue
             # The marshal mechanism works by looking at the name of the files
             # without extensions.
             basename = os.path.splitext(file)[0]  # remove extension
-            self.assets[basename] = marshal.load(basename)
-        log.info(f"Assets successfully loaded: {self.assets.keys()}")
-        log.info("Initializing assets...")
-        for asset_name, asset_value in self.assets.items():
-            globals()[asset_name] = asset_value
+            if basename != serveutils.TRANSFORMER_FN_ASSET_NAME:
+                names.append(basename)
+        return names
 
     def preprocess(self, inputs: dict) -> dict:
         """Preprocess input data."""
@@ -86,17 +128,26 @@ class KaleTransformer(kfserving.KFModel):
         log.info("Processed data: {}".format(utils.shorten_long_string(res["instances"])))
         return {**inputs, **res}
 
+    async def _preprocess_micro_batch(self, inputs: dict) -> dict:
+        """Preprocess input data along with concurrent requests."""
+        log.info("Starting inputs preprocessing...")
+        log.info(f"Input data: {utils.shorten_long_string(inputs)}")
+        res = {"instances": await self.batcher.submit(inputs["instances"])}
+        log.info("Processed data: {}".format(utils.shorten_long_string(res["instances"])))
+        return {**inputs, **res}
+
     def _run_transformer(self, inputs: dict):
         """Run the transformer function.
 
         This function needs to loads the assets in `locals` with their
         original variable names, so that the function can resolve them
         """
+        return {"instances": self._transform(inputs["instances"])}
+
+    def _transform(self, instances: list) -> list:
+        """Run the transformer function on a list of instances."""
         log.info("Running preprocessing function...")
-        res = []
-        for instance in inputs["instances"]:
-            res.append(self.fn(instance))
-        return {"instances": res}
+        return serveutils.run_preprocessing_fn(self.fn, instances, self.config.get("batch", False))
 
     def postprocess(self, inputs: list) -> list:
         """Postprocess input data."""
@@ -26,6 +26,7 @@ get_path = get_dispatcher().get_path
 get_backend = get_dispatcher().get_backend
 get_backends = get_dispatcher().get_backends
 get_backend_by_name = get_dispatcher().get_backend_by_name
+get_backend_by_path = get_dispatcher().get_backend_by_path
 
 from .decorator import Marshaller as Marshaller
 
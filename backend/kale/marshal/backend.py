@@ -222,6 +222,10 @@ class Dispatcher:
         """Get a registered backend by its display name."""
         return self.backends[name]
 
+    def get_backend_by_path(self, path: str):
+        """Get the backend registered for the type of a marshalled file."""
+        return self._dispatch_file_type(path)
+
     def save(self, obj: Any, obj_name: str):
         """Save an object to file.
 
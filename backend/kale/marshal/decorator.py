@@ -13,10 +13,12 @@
 # limitations under the License.
 
 import logging
-import marshal as marshal_utils
 import sys
 from typing import Any, NamedTuple
 
+from kale import marshal as marshal_utils
+from kale.common import astutils, cacheutils
+
 log = logging.getLogger(__name__)
 
 
@@ -33,6 +35,7 @@ def marshal(
     parameters: dict[str, PipelineParam | Any] = None,
     marshal_dir: str = None,
     introspect: bool = False,
+    cache_dir: str = None,
 ):
     """Decorator that ensures proper marshalling happens when the fn is run."""
     _params = {
@@ -41,7 +44,7 @@ def marshal(
     }
 
     def _marshal(func):
-        return Marshaller(func, ins, outs, _params, marshal_dir, introspect)
+        return Marshaller(func, ins, outs, _params, marshal_dir, introspect, cache_dir)
 
     return _marshal
 
@@ -53,7 +56,10 @@ class Marshaller:
     step and needs input arguments to be loaded from a marshal directory and
     its outputs saved likewise.
 
-
+    When a `cache_dir` is provided (or the KALE_CACHE_DIR env var is set),
+    the function is fingerprinted using its source, its marshalled inputs and
+    its parameters, and its execution is skipped if a matching one is found in
+    the cache.
     """
 
     def __init__(
@@ -64,6 +70,7 @@ class Marshaller:
         parameters: dict[str, PipelineParam] = None,
         marshal_dir=None,
         introspect=False,
+        cache_dir=None,
     ):
         self._introspect = introspect
         if introspect:
@@ -76,8 +83,34 @@ class Marshaller:
 
         marshal_utils.set_data_dir(marshal_dir)
 
+        self._source = None
+        self._cache = None
+        cache_dir = cacheutils.get_cache_dir(cache_dir)
+        if cache_dir:
+            try:
+                self._source = astutils.get_function_source(func, strip_signature=False)
+                self._cache = cacheutils.StepCache(cache_dir)
+            except (TypeError, OSError) as e:
+                log.warning(
+                    "Could not retrieve the source of the function, caching is disabled: %s", e
+                )
+
     def __call__(self):
         """Run the function by passing loaded vars and saving the results."""
+        if self._cache is None:
+            return self._run()
+        fingerprint = self._cache.fingerprint(
+            self._source,
+            inputs={
+                name: marshal_utils.get_path(name)
+                for name in self._ins
+                if name not in self._parameters
+            },
+            parameters={name: p.param_value for name, p in self._parameters.items()},
+        )
+        self._cache.run(fingerprint, self._run, self._outs, marshal_utils.get_data_dir())
+
+    def _run(self):
         loads = self._load()
         log.newline(lines=2)
         results = self._func(*loads)
@@ -21,7 +21,7 @@ from kubernetes.client.rest import ApiException
 from kubernetes.config import ConfigException
 import networkx as nx
 
-from kale.common import graphutils, podutils, utils
+from kale.common import cacheutils, graphutils, podutils, utils
 from kale.config import Config, Field, validators
 from kale.step import PipelineParam, Step
 
@@ -113,6 +113,9 @@ class PipelineConfig(Config):
         type=str, validators=[validators.IsLowerValidator, validators.VolumeAccessModeValidator]
     )
     timeout = Field(type=int, validators=[validators.PositiveIntegerValidator])
+    # Directory where the outputs of the steps are cached. When running in a
+    # pipeline, use a path on a volume shared by all the steps (e.g. a PVC).
+    cache_dir = Field(type=str)
 
     @property
     def source_path(self):
@@ -206,8 +209,9 @@ class Pipeline(nx.DiGraph):
 
     def run(self):
         """Runs the steps locally in topological sort."""
+        cache_dir = cacheutils.get_cache_dir(self.config.cache_dir)
         for step in self.steps:
-            step.run(self.pipeline_parameters)
+            step.run(self.pipeline_parameters, cache_dir=cache_dir)
 
     def add_step(self, step: Step):
         """Add a new Step to the pipeline."""
@@ -18,7 +18,7 @@ from typing import Any
 
 import nbformat as nb
 
-from kale.common import astutils, flakeutils, graphutils, utils
+from kale.common import astutils, flakeutils, graphutils, profutils, utils
 from kale.config import Field
 from kale.pipeline import PipelineConfig
 from kale.step import PipelineParam, Step
@@ -203,16 +203,18 @@ class NotebookProcessor(BaseProcessor):
 
     def to_pipeline(self):
         """Convert an annotated Notebook to a Pipeline object."""
-        (pipeline_parameters_source, pipeline_metrics_source, imports_and_functions) = (
-            self.parse_notebook()
-        )
+        with profutils.phase("parse notebook"):
+            (pipeline_parameters_source, pipeline_metrics_source, imports_and_functions) = (
+                self.parse_notebook()
+            )
 
         self.parse_pipeline_parameters(pipeline_parameters_source)
         # get a list of variables that need to be logged as pipeline metrics
         pipeline_metrics = astutils.parse_metrics_print_statements(pipeline_metrics_source)
 
         # run static analysis over the source code
-        self.dependencies_detection(imports_and_functions)
+        with profutils.phase("dependencies detection"):
+            self.dependencies_detection(imports_and_functions)
         self.assign_metrics(pipeline_metrics)
 
         # TODO: Additional action required:
@@ -15,7 +15,7 @@
 import enum
 
 from kale.rpc.log import KALE_LOG_FILE
-from kale.rpc.utils import serialize
+from kale.rpc.utils import BASE64_TRANSPORT, serialize
 
 
 class Code(enum.Enum):
@@ -55,8 +55,8 @@ class _RPCError(Exception):
             "trans_id": self.trans_id,
         }
 
-    def serialize(self):
-        return serialize(self.to_dict())
+    def serialize(self, transport=BASE64_TRANSPORT):
+        return serialize(self.to_dict(), transport)
 
 
 class RPCImportError(_RPCError):
@@ -12,13 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import kfp
-
 from kale.common import kfputils
 
 
 def _get_client(host=None):
-    return kfp.Client()
+    return kfputils.get_kfp_client(host)
 
 
 def list_experiments(request):
@@ -72,16 +70,7 @@ def create_experiment(request, experiment_name, raise_if_exists=False):
 
 
 def _get_pipeline_id(pipeline_name):
-    client = _get_client()
-    token = ""
-    pipeline_id = None
-    while pipeline_id is None or token is not None:
-        pipelines = client.list_pipelines(page_token=token)
-        token = pipelines.next_page_token
-        f = next(filter(lambda x: x.display_name == pipeline_name, pipelines.pipelines), None)
-        if f is not None:
-            pipeline_id = f.pipeline_id
-    return pipeline_id
+    return kfputils.get_pipeline_id(pipeline_name)
 
 
 def upload_pipeline(request, pipeline_package_path, pipeline_metadata):
@@ -12,23 +12,86 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
+import json
 import logging
 import os
 import shutil
+import threading
 
 from tabulate import tabulate
 
 from kale import Compiler, NotebookProcessor, marshal
-from kale.common import astutils, kfputils, kfutils, podutils
+from kale.common import astutils, kfutils, podutils
 from kale.rpc.errors import RPCInternalError
 from kale.rpc.log import create_adapter
 
 KALE_MARSHAL_DIR_POSTFIX = ".kale.marshal.dir"
 KALE_PIPELINE_STEP_ENV = "KALE_PIPELINE_STEP"
 KALE_SNAPSHOT_FINAL_ENV = "KALE_SNAPSHOT_FINAL"
+# Max number of notebook processors kept in memory across RPC calls
+PROCESSOR_CACHE_MAXSIZE = 16
 
 logger = create_adapter(logging.getLogger(__name__))
 
+# RPCs run in a long-lived kernel and the UI fires several of them per edit,
+# so processors are reused until the notebook changes on disk.
+_processor_cache: OrderedDict[tuple, NotebookProcessor] = OrderedDict()
+_processor_cache_lock = threading.Lock()
+
+
+def _get_processor(
+    source_notebook_path, notebook_metadata_overrides=None, skip_validation=False, take=False
+):
+    """Get a NotebookProcessor, reusing a cached one if possible.
+
+    Processors are keyed by notebook path, modification time, metadata
+    overrides and validation mode, so that saving the notebook or changing
+    the overrides creates a new one.
+
+    Args:
+        source_notebook_path: Path to the notebook
+        notebook_metadata_overrides: Override notebook config settings
+        skip_validation: Skip the validation of the notebook's metadata
+        take: Remove the processor from the cache. Set this when the caller
+            mutates the processor, e.g., by calling `run()`.
+    """
+    try:
+        mtime = os.stat(os.path.expanduser(source_notebook_path)).st_mtime_ns
+    except OSError:
+        # let the processor raise a proper error
+        return NotebookProcessor(
+            source_notebook_path, notebook_metadata_overrides, skip_validation=skip_validation
+        )
+    overrides = json.dumps(notebook_metadata_overrides or {}, sort_keys=True, default=str)
+    key = (source_notebook_path, mtime, overrides, skip_validation)
+    with _processor_cache_lock:
+        processor = _processor_cache.pop(key, None) if take else _processor_cache.get(key)
+        if processor is not None:
+            if not take:
+                _processor_cache.move_to_end(key)
+            return processor
+
+    processor = NotebookProcessor(
+        source_notebook_path, notebook_metadata_overrides, skip_validation=skip_validation
+    )
+    if take:
+        return processor
+    with _processor_cache_lock:
+        # drop processors of older versions of the same notebook
+        for stale in [k for k in _processor_cache if k[0] == key[0] and k[1] != mtime]:
+            del _processor_cache[stale]
+        _processor_cache[key] = processor
+        while len(_processor_cache) > PROCESSOR_CACHE_MAXSIZE:
+            _processor_cache.popitem(last=False)
+    return processor
+
+
+def clear_processor_cache():
+    """Drop all the cached notebook processors."""
+    with _processor_cache_lock:
+        _processor_cache.clear()
+
 
 def resume_notebook_path(request, server_root=None):
     """Get the relative path of the notebook found in KALE_NOTEBOOK_PATH.
@@ -95,15 +158,18 @@ def get_base_image(request):
 # fixme: Remove the debug argument from the labextension RPC call.
 def compile_notebook(request, source_notebook_path, notebook_metadata_overrides=None, debug=False):
     """Compile the notebook to KFP DSL."""
-    processor = NotebookProcessor(source_notebook_path, notebook_metadata_overrides)
+    # running the processor builds its pipeline in place, so take it out of
+    # the cache rather than sharing it with the next RPCs
+    processor = _get_processor(source_notebook_path, notebook_metadata_overrides, take=True)
     pipeline = processor.run()
     imports_and_functions = processor.get_imports_and_functions()
-    script_path = Compiler(pipeline, imports_and_functions).compile()
+    compiler = Compiler(pipeline, imports_and_functions)
+    compiler.compile()
     # FIXME: Why were we tapping into the Kale logger?
     # instance = Kale(source_notebook_path, notebook_metadata_overrides, debug)
     # instance.logger = request.log if hasattr(request, "log") else logger
 
-    package_path = kfputils.compile_pipeline(script_path, pipeline.config.pipeline_name)
+    package_path = compiler.compile_package()
 
     return {
         "pipeline_package_path": os.path.relpath(package_path),
@@ -114,7 +180,7 @@ def compile_notebook(request, source_notebook_path, notebook_metadata_overrides=
 def validate_notebook(request, source_notebook_path, notebook_metadata_overrides=None):
     """Validate notebook metadata."""
     # Notebook metadata is validated at class instantiation
-    NotebookProcessor(source_notebook_path, notebook_metadata_overrides)
+    _get_processor(source_notebook_path, notebook_metadata_overrides)
     return True
 
 
@@ -123,9 +189,7 @@ def get_pipeline_parameters(request, source_notebook_path):
     # read notebook
     log = request.log if hasattr(request, "log") else logger
     try:
-        processor = NotebookProcessor(
-            os.path.expanduser(source_notebook_path), skip_validation=True
-        )
+        processor = _get_processor(os.path.expanduser(source_notebook_path), skip_validation=True)
         params_source = processor.get_pipeline_parameters_source()
         if params_source == "":
             raise ValueError(
@@ -151,9 +215,7 @@ def get_pipeline_metrics(request, source_notebook_path):
     # read notebook
     log = request.log if hasattr(request, "log") else logger
     try:
-        processor = NotebookProcessor(
-            os.path.expanduser(source_notebook_path), skip_validation=True
-        )
+        processor = _get_processor(os.path.expanduser(source_notebook_path), skip_validation=True)
         metrics_source = processor.get_pipeline_metrics_source()
         if metrics_source == "":
             raise ValueError(
@@ -12,34 +12,93 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from functools import cache
 import importlib
 import logging
 import sys
+import time
 
 from kale.common.utils import random_string
 from kale.rpc import errors, utils
 from kale.rpc.log import create_adapter
 
+# Max length of an argument's value when logging an RPC call
+RPC_LOG_VALUE_MAX_LENGTH = 200
+# The functions the frontend can call, relative to the `kale.rpc` package
+RPC_ALLOW_LIST = (
+    "log.setup_logging",
+    "nb.resume_notebook_path",
+    "nb.list_volumes",
+    "nb.get_volume_containing_path",
+    "nb.get_base_image",
+    "nb.compile_notebook",
+    "nb.validate_notebook",
+    "nb.get_pipeline_parameters",
+    "nb.get_pipeline_metrics",
+    "nb.explore_notebook",
+    "nb.remove_marshal_dir",
+    "nb.find_poddefault_labels_on_server",
+    "nb.get_namespace",
+    "kfp.list_experiments",
+    "kfp.get_ui_host",
+    "kfp.get_experiment",
+    "kfp.create_experiment",
+    "kfp.upload_pipeline",
+    "kfp.run_pipeline",
+    "kfp.get_run",
+    "katib.create_katib_experiment",
+    "katib.get_experiment",
+)
+
 logger = create_adapter(logging.getLogger(__name__))
 
 
+class _FormatKwargs:
+    """Format the arguments of an RPC call only when they get logged."""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+    def __str__(self):
+        args = []
+        for key, value in self.kwargs.items():
+            value = str(value)
+            if len(value) > RPC_LOG_VALUE_MAX_LENGTH:
+                value = value[:RPC_LOG_VALUE_MAX_LENGTH] + "..."
+            args.append(f"{key}={value}")
+        return ", ".join(args)
+
+
+@cache
+def get_registry():
+    """Resolve the functions of the allow-list, once per process.
+
+    Returns (dict): A dict mapping RPC names to their functions. Functions
+        that cannot be resolved are logged and left out.
+    """
+    registry = {}
+    for name in RPC_ALLOW_LIST:
+        mod_str, _sep, func_str = name.rpartition(".")
+        try:
+            registry[name] = getattr(importlib.import_module(f"kale.rpc.{mod_str}"), func_str)
+        except (ImportError, AttributeError):
+            logger.exception("Could not resolve RPC function '%s'", name)
+    return registry
+
+
 def import_func(request, import_func_str):
-    """Import and return a function from a string."""
-    mod_str, _sep, func_str = import_func_str.rpartition(".")
-    mod_str = "kale.rpc." + mod_str if mod_str else "kale.rpc"
+    """Get an RPC function of the allow-list by its name."""
     try:
-        mod = importlib.import_module(mod_str)
-        return getattr(mod, func_str)
-    except (ValueError, AttributeError) as e:
-        request.log.exception(
-            "Exception while importing function '%s' of module '%s': %s", func_str, mod_str, e
-        )
-        raise ImportError(f"Function `{func_str}' of module `{mod_str}' cannot be found: {e}")
+        return get_registry()[import_func_str]
+    except KeyError:
+        raise ImportError(f"Function `{import_func_str}' is not a known RPC function") from None
 
 
-def format_success(result, trans_id):
+def format_success(result, trans_id, transport=utils.BASE64_TRANSPORT):
     """Serialise the result."""
-    return utils.serialize({"code": errors.Code.OK.value, "result": result, "trans_id": trans_id})
+    return utils.serialize(
+        {"code": errors.Code.OK.value, "result": result, "trans_id": trans_id}, transport
+    )
 
 
 class KaleRPCRequest:
@@ -61,40 +120,47 @@ def sanitize_ctx(request, ctx):
     return {"nb_path": nb_path}
 
 
-def run(func, kwargs, ctx):
+def run(func, kwargs, ctx, transport=utils.BASE64_TRANSPORT):
     """Execute command requests coming from the UI.
 
     Args:
         func: the name of function to be run
-        kwargs: A dict object with the arguments to be passed to the function
-        ctx: context
+        kwargs: The encoded arguments to be passed to the function
+        ctx: The encoded context
+        transport: How `kwargs`, `ctx` and the result are encoded. One of
+            `utils.TRANSPORTS`. See `kale.rpc.utils`.
 
-    Returns: The result of the called function
+    Returns: The encoded result of the called function
     """
     # Setup initial request obj to have something to log to
     request = KaleRPCRequest()
+    if transport not in utils.TRANSPORTS:
+        request.log.error("Unknown RPC transport '%s'", transport)
+        return errors.RPCEncodingError(
+            message=f"Unknown RPC transport '{transport}'", trans_id=request.trans_id
+        ).serialize()
     request.log.debug("Decoding ctx of RPC function '%s'", func)
     try:
-        ctx = utils.deserialize(ctx)
+        ctx = utils.deserialize(ctx, transport)
     except Exception:
         exc_info = sys.exc_info()
         request.log.exception("Failed to decode ctx: %s", ctx)
         return errors.RPCEncodingError(
             message=str(exc_info[1]), trans_id=request.trans_id
-        ).serialize()
+        ).serialize(transport)
     # Sanitize ctx and renew the request obj
     ctx = sanitize_ctx(request, ctx)
     request = KaleRPCRequest(request.trans_id, **ctx)
 
     request.log.debug("Decoding kwargs of RPC function '%s'", func)
     try:
-        kwargs = utils.deserialize(kwargs)
+        kwargs = utils.deserialize(kwargs, transport)
     except Exception:
         exc_info = sys.exc_info()
         request.log.exception("Failed to decode kwargs: %s", kwargs)
         return errors.RPCEncodingError(
             message=str(exc_info[1]), trans_id=request.trans_id
-        ).serialize()
+        ).serialize(transport)
 
     request.log.debug("Importing RPC function '%s'", func)
     try:
@@ -102,22 +168,30 @@ def run(func, kwargs, ctx):
     except ImportError as e:
         exc_info = sys.exc_info()
         request.log.exception("Failed to import RPC function '%s'", func)
-        return errors.RPCImportError(message=str(e), trans_id=request.trans_id).serialize()
+        return errors.RPCImportError(message=str(e), trans_id=request.trans_id).serialize(transport)
 
-    request.log.info(
-        "Executing RPC function '%s(%s)'",
-        func.__name__,
-        ", ".join("{}={}".format(*i) for i in kwargs.items()),
-    )
+    request.log.info("Executing RPC function '%s(%s)'", func.__name__, _FormatKwargs(kwargs))
+    start = time.perf_counter()
     try:
         result = func(request, **kwargs)
-        return format_success(result, request.trans_id)
+        request.log.info(
+            "RPC function '%s' completed in %.3fs", func.__name__, time.perf_counter() - start
+        )
+        return format_success(result, request.trans_id, transport)
     except errors._RPCError as e:
-        request.log.exception("RPC function '%s' raised an RPCError", func.__name__)
-        return e.serialize()
+        request.log.exception(
+            "RPC function '%s' raised an RPCError after %.3fs",
+            func.__name__,
+            time.perf_counter() - start,
+        )
+        return e.serialize(transport)
     except Exception:
         exc_info = sys.exc_info()
-        request.log.exception(("RPC function '%s' raised an unhandled exception"), func.__name__)
+        request.log.exception(
+            "RPC function '%s' raised an unhandled exception after %.3fs",
+            func.__name__,
+            time.perf_counter() - start,
+        )
         return errors.RPCUnhandledError(
             message=str(exc_info[1]), trans_id=request.trans_id
-        ).serialize()
+        ).serialize(transport)
@@ -12,15 +12,57 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""Encoding of RPC payloads.
+
+Payloads travel between the labextension and the kernel with one of two
+transports:
+
+- `base64`: The payload is JSON-encoded and then base64-encoded, so that it
+  can be safely embedded in the Python code the frontend executes and
+  returned as the `text/plain` repr of a string. This is the fallback.
+- `json`: The frontend embeds the JSON payload as a (JSON-escaped) string
+  literal and the response is returned as `application/json` display data.
+  The payload is JSON-encoded only once, by the kernel's messaging layer,
+  without the 33% size overhead of base64 and regardless of the characters
+  it contains.
+"""
+
 import base64
 import json
+from typing import Any
+
+BASE64_TRANSPORT = "base64"
+JSON_TRANSPORT = "json"
+TRANSPORTS = (BASE64_TRANSPORT, JSON_TRANSPORT)
+
+
+class JSONResponse:
+    """A response that IPython displays as `application/json` data."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def _repr_json_(self):
+        return self.value
+
+    def __repr__(self):
+        # keep the `text/plain` representation cheap, the frontend does not
+        # use it
+        return f"<{self.__class__.__name__}>"
+
 
+def serialize(value, transport=BASE64_TRANSPORT):
+    """Encode a JSON-serializable object for the given transport.
 
-def serialize(value):
-    """Base64 encode an JSON-serializable object."""
+    Returns: A Base64 string, or a JSONResponse with the `json` transport
+    """
+    if transport == JSON_TRANSPORT:
+        return JSONResponse(value)
     return base64.b64encode(json.dumps(value).encode("utf-8")).decode("utf-8")
 
 
-def deserialize(value):
-    """Decode a Bse64 string into a JSON object."""
+def deserialize(value, transport=BASE64_TRANSPORT):
+    """Decode a Base64 (or plain JSON) string into a JSON object."""
+    if transport == JSON_TRANSPORT:
+        return json.loads(value)
     return json.loads(base64.b64decode(value).decode("utf-8"))
@@ -103,8 +103,14 @@ class Step:
         new_artifact = Artifact(name=artifact_name, type=artifact_type, is_input=is_input)
         self.artifacts.append(new_artifact)
 
-    def run(self, pipeline_parameters_values: dict[str, PipelineParam]):
-        """Run the step locally."""
+    def run(self, pipeline_parameters_values: dict[str, PipelineParam], cache_dir: str = None):
+        """Run the step locally.
+
+        Args:
+            pipeline_parameters_values: The values of the pipeline parameters
+            cache_dir: If set, skip the execution of the step when its source,
+                inputs and parameters match a cached execution
+        """
         log.info("%s Running step '%s'... %s", "-" * 10, self.name, "-" * 10)
         # select just the pipeline parameters consumed by this step
         _params = {k: pipeline_parameters_values[k] for k in self.parameters}
@@ -114,6 +120,7 @@ class Step:
             outs=self.outs,
             parameters=_params,
             marshal_dir=".marshal/",
+            cache_dir=cache_dir,
         )
         marshaller()
         log.info("%s Successfully ran step '%s'... %s", "-" * 10, self.name, "-" * 10)
@@ -0,0 +1,200 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark the compilation of synthetic notebooks.
+
+Generate notebooks with a growing number of steps, laid out as deep (a chain
+of steps) or wide (many steps depending on the same one) DAGs, possibly with
+a large `functions` cell, and measure the time and peak memory it takes to
+convert them to KFP DSL. Peak memory is measured with tracemalloc in a
+serial compile, so it covers the whole compilation even when the timed runs
+format the code in a process pool (`--workers`).
+
+Results can be saved to a JSON file and compared against a previous run to
+catch regressions across releases:
+
+    python -m kale.tests.benchmarks.compile_benchmark --output base.json
+    python -m kale.tests.benchmarks.compile_benchmark --compare base.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+import nbformat
+
+from kale import Compiler, NotebookProcessor, __version__ as KALE_VERSION
+from kale.common import profutils
+
+DEFAULT_SIZES = [10, 50, 100, 250, 500]
+SHAPES = ["deep", "wide"]
+# Number of functions in the `functions` cell of the "large functions" case
+LARGE_FUNCTIONS_COUNT = 100
+# Slowdown ratio over the baseline that is reported as a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+def _cell(source: str, *tags: str):
+    return nbformat.v4.new_code_cell(source, metadata={"tags": list(tags)})
+
+
+def make_notebook(steps: int, shape: str, functions: int = 1) -> nbformat.NotebookNode:
+    """Generate a synthetic notebook.
+
+    Args:
+        steps: Number of pipeline steps
+        shape: 'deep' chains every step to the previous one, 'wide' makes
+            every step depend on the first one
+        functions: Number of functions defined in the `functions` cell
+    """
+    fns = "\n\n".join(
+        f"def fn_{i}(x, factor=factor):\n    y = x * factor + {i}\n    return y"
+        for i in range(functions)
+    )
+    cells = [
+        _cell("import math\nimport random", "imports"),
+        _cell(fns, "functions"),
+        _cell("factor = 2\nname = 'bench'", "pipeline-parameters"),
+        _cell("x_0 = fn_0(random.random())", "step:step_0"),
+    ]
+    for i in range(1, steps):
+        prev = i - 1 if shape == "deep" else 0
+        fn = i % functions
+        cells.append(
+            _cell(
+                f"x_{i} = fn_{fn}(x_{prev}) + math.sqrt({i})\nprint(name, x_{i})",
+                f"step:step_{i}",
+                f"prev:step_{prev}",
+            )
+        )
+    notebook = nbformat.v4.new_notebook(cells=cells)
+    notebook.metadata["kubeflow_notebook"] = {
+        "experiment_name": "benchmark",
+        "pipeline_name": f"bench-{shape}-{steps}",
+        "pipeline_description": "",
+        "base_image": "",
+        "volumes": [],
+    }
+    return notebook
+
+
+def compile_notebook(path: str, kfp: bool = False, workers: int = None):
+    """Convert a notebook to KFP DSL and, optionally, to a KFP package."""
+    processor = NotebookProcessor(path, {"abs_working_dir": "/kale"})
+    with profutils.phase("process notebook"):
+        pipeline = processor.run()
+    with profutils.phase("generate dsl"):
+        compiler = Compiler(pipeline, processor.get_imports_and_functions(), workers=workers)
+        compiler.compile()
+    if kfp:
+        with profutils.phase("compile kfp pipeline"):
+            compiler.compile_package()
+
+
+def run_case(path: str, repeat: int, kfp: bool, workers: int = None) -> dict:
+    """Measure the best compile time and the peak memory of a notebook."""
+    times, timings = [], {}
+    for _ in range(repeat):
+        gc.collect()
+        profutils.enable_profiling()
+        start = time.perf_counter()
+        compile_notebook(path, kfp, workers)
+        times.append(time.perf_counter() - start)
+        if times[-1] == min(times):
+            timings = profutils.get_timings()
+    profutils.enable_profiling(False)
+
+    # tracemalloc slows down execution, so measure memory in a separate run.
+    # It only traces this process, so the run is serial to account for the
+    # memory of the formatting as well.
+    gc.collect()
+    tracemalloc.start()
+    compile_notebook(path, kfp, workers=1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": min(times), "peak_memory_mb": peak / 2**20, "phases": timings}
+
+
+def get_cases(sizes: list[int], functions: int) -> list[tuple[str, int, str, int]]:
+    """Get the (name, steps, shape, functions) of the benchmark cases."""
+    cases = [(f"{shape}-{n}", n, shape, 1) for shape in SHAPES for n in sizes]
+    # every step embeds the `functions` cell, so keep this case small
+    cases.append((f"functions-{functions}-{sizes[0]}", sizes[0], "deep", functions))
+    return cases
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Return the cases that got slower than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base and result["time"] > base["time"] * REGRESSION_THRESHOLD:
+            regressions.append(f"{name}: {base['time']:.3f}s -> {result['time']:.3f}s")
+    return regressions
+
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--functions", type=int, default=LARGE_FUNCTIONS_COUNT)
+    parser.add_argument("--cases", type=str, nargs="+", help="Run only the named cases.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--kfp", action="store_true", help="Compile the DSL with KFP as well.")
+    parser.add_argument(
+        "--workers", type=int, help="Processes used to format the code in the timed runs."
+    )
+    parser.add_argument("--output", type=str, help="Save the results to a JSON file.")
+    parser.add_argument("--compare", type=str, help="Compare with the results in a JSON file.")
+    args = parser.parse_args()
+
+    results = {}
+    with (
+        tempfile.TemporaryDirectory() as workdir,
+        mock.patch("kale.common.utils.random_string", return_value="rnd"),
+    ):
+        cwd = os.getcwd()
+        # the compiler saves the generated code in the working directory
+        os.chdir(workdir)
+        try:
+            print(f"{'Case':<24}{'Time (s)':>10}{'Serial peak (MB)':>18}")
+            for name, steps, shape, functions in get_cases(args.sizes, args.functions):
+                if args.cases and name not in args.cases:
+                    continue
+                path = os.path.join(workdir, f"{name}.ipynb")
+                nbformat.write(make_notebook(steps, shape, functions), path)
+                result = results[name] = run_case(path, args.repeat, args.kfp, args.workers)
+                print(f"{name:<24}{result['time']:>10.3f}{result['peak_memory_mb']:>18.1f}")
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"version": KALE_VERSION, "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print("Regressions found:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -255,3 +255,21 @@ def test_link_fns_to_return_vars():
     target = {"foo": ["res"], "bar": ["res2"]}
 
     assert kale_ast.link_fns_to_return_vars(source) == target
+
+
+@pytest.mark.parametrize(
+    "code,target",
+    [
+        (_numpy_snippet, {"os", "np", "a", "b"}),
+        (
+            "import os.path\nfrom a import b as c\nx, (y, z) = 1, (2, 3)\n"
+            "def f(arg):\n    local = arg\nclass K:\n    attr = 1\n"
+            "if x:\n    w = [i for i in range(3)]\n",
+            {"os", "c", "x", "y", "z", "f", "K", "w"},
+        ),
+        ("from numpy import *\na = 1\n", None),
+    ],
+)
+def test_get_global_names(code, target):
+    """Test the names bound at the module level are found."""
+    assert kale_ast.get_global_names(code) == target
@@ -0,0 +1,90 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from kale.common import cacheutils
+from kale.marshal.decorator import Marshaller, PipelineParam
+
+
+def test_fingerprint_changes(tmp_path):
+    """Test the fingerprint depends on source, inputs and parameters."""
+    data = tmp_path / "data.txt"
+    data.write_text("a")
+    fp = cacheutils.compute_fingerprint("x = 1", {"data": str(data)}, {"p": 1})
+
+    assert fp == cacheutils.compute_fingerprint("x = 1", {"data": str(data)}, {"p": 1})
+    assert fp != cacheutils.compute_fingerprint("x = 2", {"data": str(data)}, {"p": 1})
+    assert fp != cacheutils.compute_fingerprint("x = 1", {"data": str(data)}, {"p": 2})
+    data.write_text("b")
+    assert fp != cacheutils.compute_fingerprint("x = 1", {"data": str(data)}, {"p": 1})
+
+
+def test_step_cache_run(tmp_path):
+    """Test a cached execution restores its outputs instead of running."""
+    cache = cacheutils.StepCache(str(tmp_path / "cache"))
+    data_dir = tmp_path / "marshal"
+    data_dir.mkdir()
+    calls = []
+
+    def _step():
+        calls.append(1)
+        (data_dir / "out.pkl").write_text("result")
+        return "report"
+
+    fp = cache.fingerprint("source")
+    assert cache.run(fp, _step, ["out"], str(data_dir)) == "report"
+    os.remove(data_dir / "out.pkl")
+    assert cache.run(fp, _step, ["out"], str(data_dir)) == "report"
+    assert len(calls) == 1
+    assert (data_dir / "out.pkl").read_text() == "result"
+
+
+def test_marshaller_cache(tmp_path):
+    """Test the Marshaller skips a step that already ran with same params."""
+    calls = []
+
+    def step(a):
+        calls.append(a)
+        return a + 1
+
+    def _run(a):
+        Marshaller(
+            step,
+            ["a"],
+            ["b"],
+            {"a": PipelineParam(int, a)},
+            marshal_dir=str(tmp_path / "marshal"),
+            cache_dir=str(tmp_path / "cache"),
+        )()
+
+    _run(1)
+    _run(1)
+    _run(2)
+    assert calls == [1, 2]
+
+
+def test_step_cache_unwritable_store(tmp_path):
+    """Test a step still succeeds when the cache store is not writable."""
+    store = tmp_path / "cache"
+    # a file where the cache directory should be makes it unwritable
+    store.write_text("")
+    data_dir = tmp_path / "marshal"
+    data_dir.mkdir()
+    (data_dir / "out.pkl").write_text("result")
+
+    cache = cacheutils.StepCache(str(store))
+    assert cache.run(cache.fingerprint("source"), lambda: "report", ["out"], str(data_dir)) == (
+        "report"
+    )
@@ -0,0 +1,85 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import textwrap
+from unittest import mock
+
+import autopep8
+import pytest
+
+from kale import Compiler, NotebookProcessor
+from kale.compiler import get_formatter
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK_PATH = os.path.join(THIS_DIR, "../assets/notebooks/pipeline_parameters_and_metrics.ipynb")
+
+
+def _generate_dsl(workers):
+    processor = NotebookProcessor(NOTEBOOK_PATH, {"abs_working_dir": "/kale"})
+    pipeline = processor.run()
+    return Compiler(pipeline, processor.get_imports_and_functions(), workers=workers).generate_dsl()
+
+
+@mock.patch("kale.compiler.PARALLEL_COMPILE_MIN_STEPS", new=1)
+@mock.patch("kale.common.utils.random_string", return_value="rnd")
+def test_generate_dsl_parallel(_random_string):
+    """Test parallel code generation produces the same, ordered output."""
+    assert _generate_dsl(workers=2) == _generate_dsl(workers=1)
+
+
+@mock.patch("kale.common.utils.random_string", return_value="rnd")
+def test_generate_dsl_no_formatter(_random_string):
+    """Test the generated code is valid without formatting it."""
+    processor = NotebookProcessor(NOTEBOOK_PATH, {"abs_working_dir": "/kale"})
+    pipeline = processor.run()
+    dsl = Compiler(pipeline, processor.get_imports_and_functions(), formatter="none").generate_dsl()
+    compile(dsl, "<dsl>", "exec")
+    assert dsl.endswith("\n")
+
+
+def test_get_formatter():
+    """Test builtin, callable and import path formatters are resolved."""
+    assert get_formatter("autopep8") is autopep8.fix_code
+    assert get_formatter(str.strip) is str.strip
+    assert get_formatter("textwrap:dedent") is textwrap.dedent
+    with pytest.raises(ValueError):
+        get_formatter("black")
+
+
+def test_compiler_workers(monkeypatch):
+    """Test code generation is serial unless more workers are requested."""
+    monkeypatch.delenv("KALE_COMPILE_WORKERS", raising=False)
+    assert Compiler(None, "").workers == 1
+    monkeypatch.setenv("KALE_COMPILE_WORKERS", "4")
+    assert Compiler(None, "").workers == 4
+
+
+@mock.patch("kale.compiler.PARALLEL_COMPILE_MIN_STEPS", new=1)
+@mock.patch("kale.common.utils.random_string", return_value="rnd")
+def test_generate_dsl_parallel_local_formatter(_random_string):
+    """Test a formatter that cannot be pickled falls back to serial formatting."""
+    calls = []
+
+    def _formatter(code):
+        calls.append(code)
+        return code
+
+    processor = NotebookProcessor(NOTEBOOK_PATH, {"abs_working_dir": "/kale"})
+    pipeline = processor.run()
+    compiler = Compiler(
+        pipeline, processor.get_imports_and_functions(), workers=2, formatter=_formatter
+    )
+    compiler.generate_dsl()
+    assert len(calls) == len(list(pipeline.steps)) + 1
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from queue import Empty
+
 import pytest
 from testfixtures import mock
 
@@ -55,3 +57,36 @@ def test_run_code():
     # test magic command
     code = ("%%time\nprint('Some dull code')",)
     ju.run_code(code)
+
+
+class _FakeIOPubChannel:
+    def __init__(self, msgs):
+        self.msgs = list(msgs)
+
+    def get_msg(self, timeout=None):
+        if not self.msgs:
+            raise Empty
+        return self.msgs.pop(0)
+
+
+def _stream_msg(name, text):
+    return {"header": {"msg_type": "stream"}, "content": {"name": name, "text": text}}
+
+
+def test_stream_pump_coalesces_messages(capsys):
+    """Test that the stream pump batches consecutive stream messages."""
+    msgs = [_stream_msg("stdout", f"line {i}\n") for i in range(100)]
+    msgs.append(_stream_msg("stderr", "warning\n"))
+    kc = mock.Mock()
+    kc.iopub_channel = _FakeIOPubChannel(msgs)
+
+    pump = ju.StreamPump(kc, flush_interval=0.01)
+    with mock.patch("sys.stdout.write") as write:
+        pump.start()
+        pump.stop(timeout=5)
+    # all the stdout messages were written in a handful of calls
+    assert 0 < write.call_count < 10
+    assert "".join(c.args[0] for c in write.call_args_list) == "".join(
+        f"line {i}\n" for i in range(100)
+    )
+    assert capsys.readouterr().err == "warning\n"
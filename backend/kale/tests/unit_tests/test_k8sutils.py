@@ -0,0 +1,51 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from kubernetes.client.rest import ApiException
+import pytest
+from testfixtures import mock
+
+from kale.common import k8sutils
+
+
+@mock.patch("kale.common.k8sutils._load_config")
+def test_clients_share_api_client(_load_config, monkeypatch):
+    """Test the API clients are created once and share the connection pool."""
+    monkeypatch.setenv(k8sutils.KALE_K8S_POOL_MAXSIZE_ENV, "32")
+    k8sutils.reset_clients()
+
+    v1_client = k8sutils.get_v1_client()
+    assert k8sutils.get_v1_client() is v1_client
+    assert k8sutils.get_co_client().api_client is v1_client.api_client
+    assert v1_client.api_client.configuration.connection_pool_maxsize == 32
+    _load_config.assert_called_once()
+    k8sutils.reset_clients()
+
+
+@mock.patch("kale.common.k8sutils._load_config")
+@mock.patch("kubernetes.client.ApiClient.call_api")
+def test_reload_rejected_credentials(call_api, _load_config):
+    """Test the credentials are reloaded and the request retried on 401."""
+    k8sutils.reset_clients()
+    call_api.side_effect = [ApiException(status=401), "pod"]
+
+    assert k8sutils.get_api_client().call_api("/api/v1/pods", "GET") == "pod"
+    assert _load_config.call_count == 2
+    assert call_api.call_count == 2
+
+    call_api.side_effect = ApiException(status=404)
+    with pytest.raises(ApiException):
+        k8sutils.get_api_client().call_api("/api/v1/pods", "GET")
+    assert _load_config.call_count == 2
+    k8sutils.reset_clients()
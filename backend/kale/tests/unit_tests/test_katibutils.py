@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import logging
 import os
+import threading
 
+from kubernetes.client.rest import ApiException
+from testfixtures import mock
 import yaml
 
-from kale.common import katibutils
+from kale.common import katibutils, kfputils
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -95,3 +100,111 @@ def test_img_from_env():
 
     assert katibutils._get_trial_image() == image
     del os.environ[katibutils.TRIAL_IMAGE_ENV]
+
+
+@mock.patch("kale.common.katibutils.relay_intermediate_metrics")
+@mock.patch("kale.common.katibutils.workflowutils")
+@mock.patch("kale.common.katibutils.k8sutils")
+@mock.patch("kale.common.katibutils.podutils")
+@mock.patch("kale.common.katibutils.kfputils")
+def test_create_and_wait_kfp_run(kfputils, podutils, k8sutils, workflowutils, relay):
+    """Test the trial and workflow are annotated and the metrics returned."""
+    podutils.get_namespace.return_value = "ns"
+    kfputils.run_pipeline.return_value.run_id = "run-id"
+    kfputils.get_workflow_from_run.return_value = {"metadata": {"name": "wf"}}
+    kfputils.wait_kfp_run.return_value = "Succeeded"
+    kfputils.get_kfp_run_metrics.return_value = {"accuracy": 0.9}
+    k8sutils.get_co_client.return_value.get_namespaced_custom_object.return_value = {
+        "apiVersion": "kubeflow.org/v1beta1",
+        "metadata": {
+            "name": "trial",
+            "uid": "trial-uid",
+            "ownerReferences": [
+                {
+                    "apiVersion": "kubeflow.org/v1beta1",
+                    "kind": "Experiment",
+                    "controller": True,
+                    "name": "exp",
+                    "uid": "exp-uid",
+                }
+            ],
+        },
+    }
+
+    assert katibutils.create_and_wait_kfp_run("pid", "vid", "trial", a="1") == {"accuracy": 0.9}
+    kfputils.wait_kfp_run.assert_called_once_with("run-id", watch_namespace="ns")
+    # the metrics relay is stopped once the run completes
+    assert relay.call_args.args[2].is_set()
+    k8sutils.annotate_object.assert_called_once()
+    annotations = workflowutils.annotate_workflow.call_args.args[2]
+    assert annotations[katibutils.EXPERIMENT_ID_ANNOTATION_KEY] == "exp-uid"
+    assert annotations[katibutils.TRIAL_NAME_ANNOTATION_KEY] == "trial"
+
+
+def _pod(name, seq, metrics, payload=None):
+    if payload is None:
+        payload = json.dumps({"seq": seq, "metrics": metrics})
+    return mock.Mock(
+        metadata=mock.Mock(annotations={kfputils.KFP_INTERMEDIATE_METRICS_ANNOTATION_KEY: payload}),
+        **{"metadata.name": name},
+    )
+
+
+@mock.patch("kale.common.katibutils.k8sutils")
+@mock.patch("kale.common.katibutils.kubernetes.watch.Watch")
+def test_relay_intermediate_metrics(watch, _k8sutils, caplog):
+    """Test new intermediate metrics are logged once, in Katib's format."""
+    stop = threading.Event()
+    events = [
+        _pod("step-a", 1, {"loss": 0.5}),
+        _pod("step-a", 1, {"loss": 0.5}),
+        # malformed annotations are skipped
+        _pod("step-c", None, None, payload="{"),
+        _pod("step-c", None, None, payload='{"seq": 1}'),
+        _pod("step-c", None, None, payload="[1, 2]"),
+        _pod("step-b", 1, {"loss": 0.7}),
+        _pod("step-a", 2, {"loss": 0.3}),
+    ]
+
+    def _stream(*args, **kwargs):
+        yield from ({"object": pod} for pod in events)
+        stop.set()
+
+    watch.return_value.stream.side_effect = _stream
+    with caplog.at_level(logging.INFO, logger="kale.common.katibutils"):
+        katibutils.relay_intermediate_metrics("run-id", "ns", stop)
+    messages = [
+        r.getMessage()
+        for r in caplog.records
+        if r.name == katibutils.log.name and r.levelno == logging.INFO
+    ]
+    assert messages == ["loss=0.5", "loss=0.7", "loss=0.3"]
+    warnings = [
+        r for r in caplog.records if r.name == katibutils.log.name and r.levelno == logging.WARNING
+    ]
+    assert [r.getMessage() for r in warnings] == [
+        "Invalid intermediate metrics in pod 'step-c'"
+    ] * 3
+    label_selector = watch.return_value.stream.call_args.kwargs["label_selector"]
+    assert label_selector == "pipeline/runid=run-id"
+
+
+@mock.patch("kale.common.katibutils.k8sutils")
+def test_discover_katib_version(k8sutils):
+    """Test the Katib version is discovered once from the served resources."""
+    katibutils.discover_katib_version.cache_clear()
+    co_client = k8sutils.get_co_client.return_value
+    experiments = mock.Mock()
+    experiments.name = "experiments"
+
+    def _get_api_resources(group, version):
+        if version == katibutils.KATIB_API_VERSION_V1BETA1:
+            raise ApiException(status=404)
+        return mock.Mock(resources=[experiments])
+
+    co_client.get_api_resources.side_effect = _get_api_resources
+    assert katibutils.discover_katib_version() == katibutils.KATIB_API_VERSION_V1ALPHA3
+    assert katibutils.discover_katib_version() == katibutils.KATIB_API_VERSION_V1ALPHA3
+    assert co_client.get_api_resources.call_count == 2
+    co_client.list_namespaced_custom_object.assert_not_called()
+    katibutils.discover_katib_version.cache_clear()
@@ -107,3 +107,134 @@ def test_update_uimetadata_from_not_empty(podutils, workflowutils, tmpdir):
         ]
     }
     assert updated == target
+
+
+def test_compile_pipeline_source(tmpdir):
+    """Test generated DSL code is compiled in memory to a KFP package."""
+    dsl_path = os.path.join(os.path.dirname(__file__), "../assets/kfp_dsl/iris.py")
+    package_path = os.path.join(tmpdir, "iris.pipeline.yaml")
+    with open(dsl_path) as f:
+        kfputils.compile_pipeline_source(f.read(), package_path)
+
+    package = open(package_path).read()
+    # the components' source is embedded in the package
+    assert "def train_model_step(" in package
+    assert "<kale-pipeline>" not in kfputils.linecache.cache
+
+
+@mock.patch("kale.common.kfputils.kfp.Client")
+def test_get_kfp_client_is_pooled(client_cls):
+    """Test a single KFP client is created per host."""
+    kfputils._kfp_clients.clear()
+    assert kfputils.get_kfp_client("h1") is kfputils.get_kfp_client("h1")
+    kfputils.get_kfp_client("h2")
+    assert client_cls.call_count == 2
+    kfputils._kfp_clients.clear()
+
+
+@mock.patch("kale.common.kfputils.get_kfp_client")
+def test_get_pipeline_id_cached(get_client):
+    """Test pipelines are filtered by name server side and cached."""
+    kfputils.clear_lookup_cache()
+    client = get_client.return_value
+    client.list_pipelines.return_value.pipelines = [mock.Mock(pipeline_id="pid")]
+
+    assert kfputils.get_pipeline_id("my-pipeline") == "pid"
+    assert kfputils.get_pipeline_id("my-pipeline") == "pid"
+    client.list_pipelines.assert_called_once()
+    name_filter = json.loads(client.list_pipelines.call_args.kwargs["filter"])
+    assert name_filter["predicates"][0]["stringValue"] == "my-pipeline"
+
+    # misses are not cached
+    client.list_pipelines.return_value.pipelines = None
+    assert kfputils.get_pipeline_id("other") is None
+    assert kfputils.get_pipeline_id("other") is None
+    assert client.list_pipelines.call_count == 3
+    kfputils.clear_lookup_cache()
+
+
+@mock.patch("kale.common.kfputils.get_pipeline_id", return_value=None)
+@mock.patch("kale.common.kfputils.get_kfp_client")
+def test_upload_new_pipeline(get_client, _get_pipeline_id):
+    """Test a new pipeline is uploaded once, keeping its first version."""
+    client = get_client.return_value
+    client.upload_pipeline.return_value.pipeline_id = "pid"
+    client.list_pipeline_versions.return_value.pipeline_versions = [
+        mock.Mock(pipeline_version_id="vid")
+    ]
+
+    assert kfputils.upload_pipeline("pipeline.yaml", "my-pipeline") == ("pid", "vid")
+    client.upload_pipeline.assert_called_once()
+    client.upload_pipeline_version.assert_not_called()
+    client.delete_pipeline_version.assert_not_called()
+    kfputils.clear_lookup_cache()
+
+
+@mock.patch("kale.common.kfputils.time.sleep")
+@mock.patch("kale.common.kfputils.get_run")
+def test_wait_kfp_run_backoff(get_run, sleep):
+    """Test the run is polled with growing intervals until it completes."""
+    get_run.side_effect = [mock.Mock(state=s) for s in ("PENDING", "RUNNING", "SUCCEEDED")]
+
+    assert kfputils.wait_kfp_run("run-id", max_interval=1.5) == "Succeeded"
+    intervals = [c.args[0] for c in sleep.call_args_list]
+    assert len(intervals) == 2
+    assert 0.9 <= intervals[0] <= 1.1
+    assert 1.35 <= intervals[1] <= 1.5
+
+
+@mock.patch("kale.common.kfputils.time.sleep")
+@mock.patch("kale.common.kfputils.workflowutils")
+@mock.patch("kale.common.kfputils.get_run")
+def test_wait_kfp_run_watch(get_run, workflowutils, sleep):
+    """Test the run's workflow is watched before checking the run status."""
+    get_run.return_value = mock.Mock(state="FAILED")
+
+    assert kfputils.wait_kfp_run("run-id", watch_namespace="ns") == "Failed"
+    workflowutils.watch_workflow_completion.assert_called_once_with(
+        "ns", "pipeline/runid=run-id", None
+    )
+    sleep.assert_not_called()
+
+
+@mock.patch("kale.common.kfputils.get_kfp_client")
+def test_run_pipelines(get_client):
+    """Test a batch of runs resolves the pipeline once and keeps its order."""
+    client = get_client.return_value
+    client.get_pipeline.return_value.display_name = "pipeline"
+    client.get_pipeline_version.return_value.display_name = "v1"
+    client.create_experiment.return_value.experiment_id = "eid"
+    client.run_pipeline.side_effect = lambda _eid, name, **kwargs: mock.Mock(
+        run_id=name, params=kwargs["params"]
+    )
+
+    arguments = [{"lr": lr} for lr in (0.1, 0.01, 0.001)]
+    runs = kfputils.run_pipelines(
+        "exp", "pid", arguments, version_id="vid", run_name_prefix="sweep", max_workers=2
+    )
+    assert [run.params for run in runs] == arguments
+    assert [run.run_id for run in runs] == ["sweep-0", "sweep-1", "sweep-2"]
+    client.create_experiment.assert_called_once_with("exp")
+    client.get_pipeline.assert_called_once_with("pid")
+    client.get_pipeline_version.assert_called_once()
+    for call in client.run_pipeline.call_args_list:
+        assert call.kwargs["pipeline_id"] == "pid"
+        assert call.kwargs["version_id"] == "vid"
+
+
+@mock.patch("kale.common.kfputils.podutils")
+def test_publish_intermediate_metrics(podutils):
+    """Test intermediate metrics are published with increasing sequence."""
+    podutils.get_pod_name.return_value = "pod"
+    podutils.get_namespace.return_value = "ns"
+
+    kfputils.publish_intermediate_metrics({"loss": "0.5", "model": "resnet"})
+    kfputils.publish_intermediate_metrics({"loss": 0.3})
+
+    payloads = []
+    for call in podutils.patch_pod.call_args_list:
+        assert call.args[:2] == ("pod", "ns")
+        annotations = call.args[2]["metadata"]["annotations"]
+        payloads.append(json.loads(annotations[kfputils.KFP_INTERMEDIATE_METRICS_ANNOTATION_KEY]))
+    assert [p["metrics"] for p in payloads] == [{"loss": 0.5}, {"loss": 0.3}]
+    assert payloads[1]["seq"] == payloads[0]["seq"] + 1
@@ -12,7 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from kubernetes.client.models import V1Volume
+from kubernetes.client.models import (
+    V1Container,
+    V1ObjectMeta,
+    V1PersistentVolumeClaimVolumeSource,
+    V1Pod,
+    V1PodSpec,
+    V1Volume,
+    V1VolumeMount,
+)
 import pytest
 from testfixtures import mock
 
@@ -59,3 +67,55 @@ def test_get_volume_containing_path_runtime_error(os, list_volumes, path):
     list_volumes.return_value = _list_volumes_return_value
     with pytest.raises(RuntimeError):
         podutils.get_volume_containing_path(path)
+
+
+def _volume(name, claim_name=None):
+    claim = V1PersistentVolumeClaimVolumeSource(claim_name=claim_name) if claim_name else None
+    return V1Volume(name=name, persistent_volume_claim=claim)
+
+
+@mock.patch("kale.common.podutils.get_namespace", return_value="ns")
+@mock.patch("kale.common.podutils.get_pod_name", return_value="pod")
+@mock.patch("kale.common.podutils.k8sutils")
+def test_pod_context(k8sutils, _get_pod_name, _get_namespace, monkeypatch):
+    """Test the pod is read once and its PVCs are listed in order."""
+    monkeypatch.setenv("NB_PREFIX", "/notebook/ns/main")
+    podutils.clear_pod_context()
+    client = k8sutils.get_v1_client.return_value
+    client.read_namespaced_pod.return_value = V1Pod(
+        metadata=V1ObjectMeta(name="pod"),
+        spec=V1PodSpec(
+            containers=[
+                V1Container(
+                    name="main",
+                    volume_mounts=[
+                        V1VolumeMount(name="workspace", mount_path="/home/jovyan"),
+                        V1VolumeMount(name="data", mount_path="/data"),
+                    ],
+                )
+            ],
+            volumes=[
+                _volume("workspace", "workspace-pvc"),
+                _volume("dshm"),
+                _volume("data", "data-pvc"),
+            ],
+        ),
+    )
+    sizes = {"workspace-pvc": "5Gi", "data-pvc": "1Gi"}
+    client.read_namespaced_persistent_volume_claim.side_effect = lambda name, _ns: mock.Mock(
+        **{"spec.resources.requests": {"storage": sizes[name]}}
+    )
+
+    volumes = podutils.list_volumes()
+    assert [(path, v.name, size) for path, v, size in volumes] == [
+        ("/home/jovyan", "workspace", 5 * 2**30),
+        ("/data", "data", 2**30),
+    ]
+    assert podutils.get_pod_context().container_name == "main"
+    assert podutils.list_volumes() is volumes
+    client.read_namespaced_pod.assert_called_once_with("pod", "ns")
+    assert client.read_namespaced_persistent_volume_claim.call_count == 2
+
+    podutils.get_pod_context(refresh=True)
+    assert client.read_namespaced_pod.call_count == 2
+    podutils.clear_pod_context()
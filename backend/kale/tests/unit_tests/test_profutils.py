@@ -0,0 +1,36 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from kale.common import profutils
+
+
+def test_phase():
+    """Test nested phases are accumulated and reported in entry order."""
+    profutils.enable_profiling()
+    try:
+        with profutils.phase("outer"):
+            for _ in range(2):
+                with profutils.phase("inner"):
+                    pass
+        with profutils.phase("last"):
+            pass
+        assert list(profutils.get_timings()) == ["outer", "outer/inner", "last"]
+        report = profutils.format_report().splitlines()
+        assert report[2].startswith("  inner")
+        assert report[-1].startswith("Total")
+    finally:
+        profutils.enable_profiling(False)
+    with profutils.phase("disabled"):
+        pass
+    assert profutils.get_timings() == {}
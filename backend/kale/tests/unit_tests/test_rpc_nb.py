@@ -86,3 +86,25 @@ def test_get_pipeline_metrics(tmpdir, _rpc_request):
     nbformat.write(notebook, notebook_path, nbformat.NO_CONVERT)
     target = {"metric-1": "metric_1", "metric-2": "metric_2"}
     assert nb.get_pipeline_metrics(_rpc_request, notebook_path) == target
+
+
+def test_get_processor_cache(tmpdir):
+    """Test processors are reused until the notebook changes on disk."""
+    nb.clear_processor_cache()
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells = [nbformat.v4.new_code_cell("a=1", metadata={"tags": ["pipeline-parameters"]})]
+    notebook_path = os.path.join(tmpdir, "test.ipynb")
+    nbformat.write(notebook, notebook_path, nbformat.NO_CONVERT)
+
+    processor = nb._get_processor(notebook_path, skip_validation=True)
+    assert nb._get_processor(notebook_path, skip_validation=True) is processor
+    # a processor that is taken out of the cache is not shared anymore
+    assert nb._get_processor(notebook_path, skip_validation=True, take=True) is processor
+    assert nb._get_processor(notebook_path, skip_validation=True) is not processor
+
+    processor = nb._get_processor(notebook_path, skip_validation=True)
+    stat = os.stat(notebook_path)
+    os.utime(notebook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert nb._get_processor(notebook_path, skip_validation=True) is not processor
+    assert len(nb._processor_cache) == 1
+    nb.clear_processor_cache()
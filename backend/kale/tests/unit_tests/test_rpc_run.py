@@ -0,0 +1,87 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+import logging
+import re
+
+import pytest
+
+from kale.rpc import errors, nb, run, utils
+
+
+def _encode(value, transport):
+    value = json.dumps(value)
+    return base64.b64encode(value.encode()).decode() if transport == "base64" else value
+
+
+def _decode(response, transport):
+    if transport == "base64":
+        return utils.deserialize(response)
+    assert isinstance(response, utils.JSONResponse)
+    return response._repr_json_()
+
+
+@pytest.mark.parametrize("transport", utils.TRANSPORTS)
+def test_run_transports(transport):
+    """Test RPCs decode arguments and encode results with the transport."""
+    kwargs = _encode({"source_notebook_path": "/nb/ünïcode.ipynb"}, transport)
+    ctx = _encode({"nb_path": None}, transport)
+
+    response = _decode(run.run("nb.explore_notebook", kwargs, ctx, transport), transport)
+    assert response["code"] == errors.Code.OK.value
+    assert response["result"] == {"is_exploration": False, "step_name": ""}
+
+    response = _decode(run.run("nb.not_a_function", kwargs, ctx, transport), transport)
+    assert response["code"] == errors.Code.IMPORT_ERROR.value
+
+
+def test_run_unknown_transport():
+    """Test an unknown transport falls back to a base64 encoding error."""
+    response = utils.deserialize(run.run("nb.explore_notebook", "{}", "{}", "msgpack"))
+    assert response["code"] == errors.Code.ENCODING_ERROR.value
+
+
+def test_format_kwargs(caplog):
+    """Test large arguments are truncated in the RPC logs."""
+    caplog.set_level(logging.INFO, logger=run.logger.logger.name)
+    run.run(
+        "nb.explore_notebook",
+        utils.serialize({"source_notebook_path": "x" * 1000}),
+        utils.serialize({}),
+    )
+    (message,) = [r.getMessage() for r in caplog.records if "Executing" in r.getMessage()]
+    assert f"source_notebook_path={'x' * run.RPC_LOG_VALUE_MAX_LENGTH}..." in message
+
+
+def test_import_func():
+    """Test only the functions of the allow-list can be called."""
+    assert run.import_func(None, "nb.explore_notebook") is nb.explore_notebook
+    # a function of an RPC module that is not an entry point
+    with pytest.raises(ImportError):
+        run.import_func(None, "nb.unmarshal_data")
+    with pytest.raises(ImportError):
+        run.import_func(None, "os.system")
+
+
+def test_run_logs_latency(caplog):
+    """Test the duration of an RPC call is logged."""
+    caplog.set_level(logging.INFO, logger=run.logger.logger.name)
+    kwargs = utils.serialize({"source_notebook_path": "/nb/test.ipynb"})
+    run.run("nb.explore_notebook", kwargs, utils.serialize({}))
+    assert any(
+        re.fullmatch(r"RPC function 'explore_notebook' completed in \d+\.\d{3}s", r.getMessage())
+        for r in caplog.records
+    )
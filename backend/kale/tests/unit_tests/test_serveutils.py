@@ -0,0 +1,244 @@
+# Copyright 2026 The Kubeflow Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import os
+import shutil
+
+import pytest
+from testfixtures import mock
+
+from kale.common import astutils as kale_ast, serveutils
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK_PATH = os.path.join(THIS_DIR, "../assets/notebooks/pipeline_parameters_and_metrics.ipynb")
+
+
+def test_micro_batcher_merges_requests():
+    """Test concurrent requests are processed in a single batch."""
+    batches = []
+
+    def _double(instances):
+        batches.append(instances)
+        return [2 * i for i in instances]
+
+    async def _main():
+        batcher = serveutils.MicroBatcher(_double, window=0.05)
+        results = await asyncio.gather(
+            batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([])
+        )
+        await asyncio.sleep(0)
+        # batch tasks are referenced until they are done
+        assert not batcher._tasks
+        return results
+
+    assert asyncio.run(_main()) == [[2, 4], [6], []]
+    assert batches == [[1, 2, 3]]
+
+
+def test_micro_batcher_max_batch_size():
+    """Test a batch is processed as soon as it is full."""
+    batches = []
+
+    def _identity(instances):
+        batches.append(instances)
+        return instances
+
+    async def _main():
+        batcher = serveutils.MicroBatcher(_identity, window=60, max_batch_size=2)
+        return await asyncio.gather(*(batcher.submit([i]) for i in range(4)))
+
+    assert asyncio.run(_main()) == [[0], [1], [2], [3]]
+    assert batches == [[0, 1], [2, 3]]
+
+
+def test_micro_batcher_error():
+    """Test every request of a failed batch gets the error."""
+
+    async def _main():
+        batcher = serveutils.MicroBatcher(lambda instances: instances[:1], window=0.01)
+        return await asyncio.gather(batcher.submit([1]), batcher.submit([2]))
+
+    with pytest.raises(ValueError):
+        asyncio.run(_main())
+
+
+@mock.patch("kale.common.serveutils.get_inference_service_host", return_value="model.svc")
+def test_kfserver_predict_batch(get_host):
+    """Test the host is resolved once and every request is sent in order."""
+    kfserver = serveutils.KFServer("model", spec="")
+    session = kfserver._session = mock.Mock()
+    session.post.side_effect = lambda url, data, headers: mock.Mock(
+        status_code=200, text=json.dumps({"predictions": [data]})
+    )
+
+    results = kfserver.predict_batch([str(i) for i in range(10)], max_workers=4)
+    assert [r["predictions"] for r in results] == [[str(i)] for i in range(10)]
+    get_host.assert_called_once_with("model")
+    assert session.post.call_count == 10
+    assert all(c.kwargs["headers"]["Host"] == "model.svc" for c in session.post.call_args_list)
+
+
+class _Doubler:
+    def predict(self, instances):
+        return [2 * x for x in instances]
+
+
+@mock.patch.object(serveutils.marshal, "get_backend")
+def test_serve_local(get_backend):
+    """Test a model is served locally, chaining the preprocessing function."""
+    get_backend.return_value.predictor_type = "sklearn"
+
+    @serveutils.accepts_batch
+    def _preprocess(instances):
+        return [x + 1 for x in instances]
+
+    kfserver = serveutils.serve(
+        _Doubler(), name="doubler", preprocessing_fn=_preprocess, local=True
+    )
+    try:
+        data = json.dumps({"instances": [1, 2]})
+        assert kfserver.predict(data) == {"predictions": [4, 6]}
+        assert kfserver.predict_batch([data] * 3) == [{"predictions": [4, 6]}] * 3
+        assert kfserver.session.get(kfserver.url.replace(":predict", "")).json()["ready"]
+        assert kfserver._send("not json").status_code == 400
+
+        report = serveutils.load_test(kfserver, data, num_requests=20, concurrency=4)
+        assert report["requests"] == 20
+        assert report["errors"] == 0
+        assert 0 < report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"]
+    finally:
+        kfserver.delete()
+
+
+def _inference_service(ready, host="model.svc"):
+    status = "True" if ready else "False"
+    return {
+        "status": {
+            "conditions": [{"type": "Ready", "status": status}],
+            "default": {"predictor": {"host": host}},
+        }
+    }
+
+
+@mock.patch("kale.common.serveutils.podutils")
+@mock.patch("kale.common.serveutils.k8sutils")
+@mock.patch("kale.common.serveutils.kubernetes.watch.Watch")
+def test_monitor_inference_service(watch, _k8sutils, _podutils):
+    """Test the InferenceService is watched until it is ready."""
+    watch.return_value.stream.side_effect = [
+        iter([{"type": "ADDED", "object": _inference_service(False)}]),
+        iter([{"type": "MODIFIED", "object": _inference_service(True)}]),
+    ]
+
+    assert serveutils.monitor_inference_service("model") == "model.svc"
+    assert watch.return_value.stream.call_count == 2
+    kwargs = watch.return_value.stream.call_args.kwargs
+    assert kwargs["field_selector"] == "metadata.name=model"
+
+
+@mock.patch("kale.common.serveutils.podutils")
+@mock.patch("kale.common.serveutils.k8sutils")
+@mock.patch("kale.common.serveutils.kubernetes.watch.Watch")
+def test_monitor_inference_service_async(watch, _k8sutils, _podutils):
+    """Test several InferenceServices are awaited concurrently, with a deadline."""
+    watch.return_value.stream.side_effect = lambda *args, field_selector, **kwargs: iter(
+        [{"type": "ADDED", "object": _inference_service(True, field_selector)}]
+    )
+
+    async def _main():
+        return await asyncio.gather(
+            *(serveutils.monitor_inference_service_async(n, timeout=5) for n in ("a", "b"))
+        )
+
+    assert asyncio.run(_main()) == ["metadata.name=a", "metadata.name=b"]
+
+    watch.return_value.stream.side_effect = lambda *args, **kwargs: iter([])
+    with pytest.raises(TimeoutError):
+        serveutils.monitor_inference_service("model", timeout=0)
+
+
+def _scale(x):
+    return x * factor  # noqa: F821
+
+
+@mock.patch("kale.common.serveutils.jputils.get_notebook_path", return_value=NOTEBOOK_PATH)
+def test_prepare_transformer_assets(_get_notebook_path, tmp_path, monkeypatch):
+    """Test the transformer's init code and assets are saved at deploy time."""
+    monkeypatch.setattr(serveutils, "TRANSFORMER_ASSETS_DIR", str(tmp_path))
+    with pytest.raises(RuntimeError):
+        serveutils._prepare_transformer_assets(_scale)
+
+    serveutils._prepare_transformer_assets(_scale, {"factor": 2})
+    with open(tmp_path / serveutils.TRANSFORMER_CONFIG_NAME) as f:
+        config = json.load(f)
+    assert config["assets"] == ["factor"]
+    assert config["init_code"].startswith("import")
+    assert config["batch"] is False
+
+
+def test_link_marshalled_model(tmp_path, monkeypatch):
+    """Test a marshalled model is linked, replacing the previous model."""
+    model_dir = tmp_path / "predictor"
+    monkeypatch.setattr(serveutils, "PREDICTOR_MODEL_DIR", str(model_dir))
+    model_dir.mkdir()
+    (model_dir / "model.bst").write_text("old")
+    marshalled = tmp_path / "marshal" / "clf.joblib"
+    marshalled.parent.mkdir()
+    marshalled.write_text("model")
+
+    path = serveutils._link_marshalled_model(str(marshalled))
+    assert path == str(model_dir / "model.joblib")
+    assert os.listdir(model_dir) == ["model.joblib"]
+    assert os.path.samefile(path, marshalled)
+
+    saved_model = tmp_path / "marshal" / "net.tfkeras"
+    (saved_model / "variables").mkdir(parents=True)
+    (saved_model / "variables" / "data").write_text("weights")
+    path = serveutils._link_marshalled_model(str(saved_model))
+    assert os.path.samefile(
+        os.path.join(path, "variables", "data"), saved_model / "variables" / "data"
+    )
+    assert os.listdir(model_dir) == ["model.tfkeras"]
+
+
+@mock.patch.object(serveutils.marshal, "get_backend_by_path")
+def test_serve_local_model_path(get_backend_by_path, tmp_path):
+    """Test an already marshalled model is served without being saved again."""
+    get_backend_by_path.return_value.predictor_type = "sklearn"
+    get_backend_by_path.return_value.load.return_value = _Doubler()
+
+    kfserver = serveutils.serve(model_path=str(tmp_path / "model.joblib"), local=True)
+    try:
+        assert kfserver.predict(json.dumps({"instances": [1]})) == {"predictions": [2]}
+    finally:
+        kfserver.delete()
+    with pytest.raises(ValueError):
+        serveutils.serve(_Doubler(), model_path="model.joblib", local=True)
+
+
+@mock.patch("kale.common.serveutils.NotebookProcessor", wraps=serveutils.NotebookProcessor)
+def test_analyze_notebook_cache(processor, tmp_path):
+    """Test the notebook is parsed again only when it is modified."""
+    notebook_path = tmp_path / "nb.ipynb"
+    shutil.copy(NOTEBOOK_PATH, notebook_path)
+    serveutils._analyze_notebook(str(notebook_path))
+    init_code, defined_names, _ = serveutils._analyze_notebook(str(notebook_path))
+    assert processor.call_count == 1
+    assert defined_names == kale_ast.get_global_names(init_code)
+
+    os.utime(notebook_path, ns=(0, 0))
+    serveutils._analyze_notebook(str(notebook_path))
+    assert processor.call_count == 2